@@ -1,42 +1,412 @@
-from odoo import models, fields, api
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from odoo import models, fields, api, tools
+from requests.adapters import HTTPAdapter
 import requests
+import threading
 import logging
+import time
 import json
 
 _logger = logging.getLogger(__name__)
 
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+# Connections kept alive per brand; bulk syncs may run several workers per brand
+POOL_MAXSIZE = 10
+# Upper bound for ordable.sync_concurrency
+MAX_SYNC_WORKERS = 16
+
+# Circuit breaker defaults, overridable per brand
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_COOLDOWN = 60
+
+# Rate limiting: statuses meaning "slow down", how long a request may wait
+# inline for Ordable's Retry-After, and how many times it is retried then
+THROTTLE_STATUSES = (429, 503)
+DEFAULT_THROTTLE_WAIT = 1
+MAX_INLINE_THROTTLE_WAIT = 10
+MAX_THROTTLE_RETRIES = 2
+DEFAULT_RATE_BURST = 10
+
+# One keep-alive session per (base url, token), shared by every call site of the process
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+# One circuit breaker per (base url, token, endpoint), per process
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+# One token bucket per API token, per process
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+class OrdableDeadlineExceeded(requests.exceptions.Timeout):
+    """The caller's deadline ran out before the request could be sent."""
+
+
+class OrdableCircuitOpen(requests.exceptions.ConnectionError):
+    """The endpoint's circuit is open: the request was not sent."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker. ``threshold`` consecutive failures open the
+    circuit; after ``cooldown`` seconds a single probe is let through
+    (half-open) and its outcome closes or re-opens the circuit.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self._lock = threading.Lock()
+
+    def retry_after(self):
+        return max(self.cooldown - (time.monotonic() - self.opened_at), 0) if self.state != self.CLOSED else 0
+
+    def before_call(self, name):
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self.probing = False
+            if self.state == self.OPEN or (self.state == self.HALF_OPEN and self.probing):
+                raise OrdableCircuitOpen(f"Circuit open for {name}", self.retry_after() or self.cooldown)
+            if self.state == self.HALF_OPEN:
+                self.probing = True
+
+    def release(self):
+        """Give back a half-open probe that was never sent."""
+        with self._lock:
+            self.probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                if self.state != self.OPEN:
+                    _logger.warning(f"[ORDABLE] Circuit opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class TokenBucket:
+    """
+    Client-side rate limiter. Allows ``rate`` requests per second with bursts
+    of up to ``burst``; a rate of 0 means unlimited. When Ordable throttles
+    (see throttle()), every caller pauses until Retry-After and the rate is
+    halved, then it recovers gradually with each accepted request.
+    """
+    MIN_RATE = 0.1
+
+    def __init__(self, rate, burst):
+        self.configured_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def configure(self, rate, burst):
+        with self._lock:
+            if rate != self.configured_rate:
+                self.configured_rate = self.rate = rate
+            self.burst = burst
+
+    def reserve(self):
+        """Take a token and return how many seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(self.paused_until - now, 0)
+            if not self.rate:
+                return wait
+            self.tokens = min(self.tokens + (now - self.updated) * self.rate, self.burst)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens < 0:
+                wait = max(wait, -self.tokens / self.rate)
+            return wait
+
+    def cancel(self):
+        """Give back a reserved token that will not be used."""
+        with self._lock:
+            if self.rate:
+                self.tokens = min(self.tokens + 1, self.burst)
+
+    def throttle(self, retry_after):
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+            if self.rate:
+                self.rate = max(self.rate / 2, self.MIN_RATE)
+
+    def record_success(self):
+        if self.rate and self.rate < self.configured_rate:
+            with self._lock:
+                self.rate = min(self.rate + self.configured_rate * 0.05, self.configured_rate)
+
+
 class OrdableAPI(models.AbstractModel):
     _name = 'ordable.api'
     _description = 'Ordable API Connector'
 
+    @tools.ormcache()
     def _get_config(self):
+        # ir.config_parameter clears the registry caches whenever a parameter changes
         base_url = self.env['ir.config_parameter'].sudo().get_param('ordable.base_url')
         token = self.env['ir.config_parameter'].sudo().get_param('ordable.api_token')
         return base_url, token
 
-    def _push_to_ordable(self, payload, endpoint, method, brand):
-        base_url = brand.ordable_base_url
-        token = brand.ordable_api_token
-        url = f"{base_url.rstrip('/')}/{endpoint.lstrip('/')}/"
-        headers = {
-            "Authorization": token,
-            "Content-Type": "application/json"
+    # ------------------------------------------------------------
+    # Shared HTTP client
+    #
+    # ``brand`` is anything exposing ordable_base_url and ordable_api_token
+    # (an ordable.brand record). The optional ordable_connect_timeout,
+    # ordable_timeout, ordable_deadline, ordable_breaker_* and
+    # ordable_rate_* attributes tune the client per brand and fall back to
+    # the module defaults.
+    # ------------------------------------------------------------
+
+    def _get_session(self, brand):
+        key = (brand.ordable_base_url, brand.ordable_api_token)
+        session = _sessions.get(key)
+        if session is None:
+            with _sessions_lock:
+                session = _sessions.get(key)
+                if session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    session.headers.update({
+                        "Authorization": brand.ordable_api_token,
+                        "Content-Type": "application/json",
+                        "Accept": "application/json",
+                    })
+                    _sessions[key] = session
+        return session
+
+    def _get_timeouts(self, brand):
+        connect = getattr(brand, 'ordable_connect_timeout', 0) or DEFAULT_CONNECT_TIMEOUT
+        read = getattr(brand, 'ordable_timeout', 0) or DEFAULT_READ_TIMEOUT
+        return connect, read
+
+    def _get_deadline(self, brand):
+        """Absolute monotonic deadline for a bulk run on this brand, or None."""
+        budget = getattr(brand, 'ordable_deadline', 0)
+        return time.monotonic() + budget if budget else None
+
+    def _build_url(self, brand, endpoint):
+        return f"{brand.ordable_base_url.rstrip('/')}/{endpoint.lstrip('/')}"
+
+    def _get_breaker(self, brand, endpoint):
+        # 'products/12/' and 'products/' share the 'products' circuit
+        endpoint_key = endpoint.strip('/').split('/')[0].split('?')[0]
+        key = (brand.ordable_base_url, brand.ordable_api_token, endpoint_key)
+        threshold = getattr(brand, 'ordable_breaker_threshold', 0) or DEFAULT_BREAKER_THRESHOLD
+        cooldown = getattr(brand, 'ordable_breaker_cooldown', 0) or DEFAULT_BREAKER_COOLDOWN
+        breaker = _breakers.get(key)
+        if breaker is None:
+            with _breakers_lock:
+                breaker = _breakers.setdefault(key, CircuitBreaker(threshold, cooldown))
+        # Follow settings changed on the brand since the breaker was created
+        breaker.threshold, breaker.cooldown = threshold, cooldown
+        return breaker
+
+    def _get_circuit_states(self, brand):
+        """{endpoint: (state, seconds until next probe)} for the brand's circuits in this process."""
+        return {
+            key[2]: (breaker.state, round(breaker.retry_after()))
+            for key, breaker in list(_breakers.items())
+            if key[:2] == (brand.ordable_base_url, brand.ordable_api_token)
         }
 
+    def _get_bucket(self, brand):
+        rate = getattr(brand, 'ordable_rate_limit', 0) or 0
+        burst = getattr(brand, 'ordable_rate_burst', 0) or DEFAULT_RATE_BURST
+        bucket = _buckets.get(brand.ordable_api_token)
+        if bucket is None:
+            with _buckets_lock:
+                bucket = _buckets.setdefault(brand.ordable_api_token, TokenBucket(rate, burst))
+        bucket.configure(rate, burst)
+        return bucket
+
+    def _get_retry_after(self, response):
+        """Seconds Ordable asks us to wait (Retry-After as seconds or HTTP date), or None."""
+        if response.status_code not in THROTTLE_STATUSES:
+            return None
+        value = response.headers.get('Retry-After')
+        if not value:
+            return DEFAULT_THROTTLE_WAIT if response.status_code == 429 else None
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+        try:
+            return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0)
+        except (TypeError, ValueError):
+            return DEFAULT_THROTTLE_WAIT
+
+    def _wait_for_token(self, bucket, deadline, method, endpoint):
+        wait = bucket.reserve()
+        if wait and deadline is not None and time.monotonic() + wait >= deadline:
+            bucket.cancel()
+            raise OrdableDeadlineExceeded(f"Deadline exceeded while rate limited before {method} {endpoint}")
+        if wait:
+            time.sleep(wait)
+
+    def _request(self, brand, method, endpoint, payload=None, deadline=None, **kwargs):
+        """
+        Send one request to the brand's Ordable API through the pooled session.
+        ``payload`` is sent as JSON, other keyword arguments go to requests.
+        Timeouts are capped by ``deadline`` (see _get_deadline) when given.
+
+        Requests go through the brand token's rate limiter. A 429/503 answer
+        with a short Retry-After is waited out and retried; a longer one is
+        returned to the caller, who can use _get_retry_after() to reschedule.
+
+        Connection errors, timeouts and other 5xx answers count as failures
+        for the endpoint's circuit breaker; while it is open,
+        OrdableCircuitOpen is raised immediately instead of waiting on a dead
+        endpoint. Raises the usual requests exceptions.
+        """
+        if payload is not None:
+            kwargs['json'] = payload
+        url = self._build_url(brand, endpoint)
+        breaker = self._get_breaker(brand, endpoint)
+        bucket = self._get_bucket(brand)
+
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            breaker.before_call(url)
+            try:
+                self._wait_for_token(bucket, deadline, method, endpoint)
+                connect, read = self._get_timeouts(brand)
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise OrdableDeadlineExceeded(f"Deadline exceeded before {method} {endpoint}")
+                    connect, read = min(connect, remaining), min(read, remaining)
+            except Exception:
+                # Nothing was sent: a half-open circuit must let the next call probe
+                breaker.release()
+                raise
+
+            try:
+                response = self._get_session(brand).request(method, url, timeout=(connect, read), **kwargs)
+            except Exception:
+                breaker.record_failure()
+                raise
+
+            retry_after = self._get_retry_after(response)
+            if retry_after is None:
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                    bucket.record_success()
+                return response
+
+            # Throttled: not an outage, so the breaker is left alone
+            breaker.record_success()
+            bucket.throttle(retry_after)
+            _logger.warning(f"[ORDABLE] {method} {endpoint} throttled ({response.status_code}), retry after {retry_after:.1f}s")
+            if retry_after > MAX_INLINE_THROTTLE_WAIT:
+                break
+        return response
+
+    # ------------------------------------------------------------
+    # Parallel bulk runs
+    # ------------------------------------------------------------
+
+    def _get_sync_concurrency(self):
+        """Number of worker threads for bulk syncs (system parameter ordable.sync_concurrency)."""
+        value = self.env['ir.config_parameter'].sudo().get_param('ordable.sync_concurrency', '1')
+        try:
+            return max(1, min(int(value), MAX_SYNC_WORKERS))
+        except ValueError:
+            return 1
+
+    def _run_partitioned(self, model_name, method_name, record_model, partitions):
+        """
+        Call ``env[model_name].<method_name>(env[record_model].browse(ids))`` once
+        per partition of ids, fanned out over a bounded thread pool.
+
+        Every worker runs in its own cursor and environment and commits its own
+        transaction, so partitions must not write the same rows. A failing
+        partition is rolled back and logged without affecting the others.
+        Falls back to running in the current transaction when there is a single
+        partition, a single worker, or under tests.
+
+        Returns the list of per-partition results (None for failed partitions).
+        """
+        partitions = [ids for ids in partitions if ids]
+        workers = min(self._get_sync_concurrency(), len(partitions))
+        if workers <= 1 or getattr(threading.current_thread(), 'testing', False):
+            model = self.env[model_name]
+            return [getattr(model, method_name)(self.env[record_model].browse(ids)) for ids in partitions]
+
+        dbname = self.env.cr.dbname
+        uid = self.env.uid
+        context = dict(self.env.context)
+        registry = self.env.registry
+
+        def run(ids):
+            thread = threading.current_thread()
+            thread.dbname = dbname
+            thread.uid = uid
+            try:
+                with registry.cursor() as cr:
+                    env = api.Environment(cr, uid, context)
+                    return getattr(env[model_name], method_name)(env[record_model].browse(ids))
+            except Exception:
+                _logger.exception(f"[ORDABLE] {model_name}.{method_name} failed for {record_model} {ids}")
+                return None
+
+        _logger.info(f"[ORDABLE] Running {model_name}.{method_name} on {len(partitions)} partitions with {workers} workers")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ordable_sync') as executor:
+            return list(executor.map(run, partitions))
+
+    def _push_to_ordable(self, payload, endpoint, method, brand):
+        endpoint = f"{endpoint.strip('/')}/"
+        url = self._build_url(brand, endpoint)
+
         try:
             data = json.loads(payload)
             category_name = data.get("name", "Unnamed")
             _logger.info(f"[ORDABLE] {method} {endpoint} '{category_name}' to {url} ...")
             if method=="DELETE":
-                response = requests.request(method, url, headers=headers, timeout=15)
+                response = self._request(brand, method, endpoint)
             else:
-                response = requests.request(method, url, headers=headers, data=payload, timeout=15)
+                response = self._request(brand, method, endpoint, data=payload)
             status_code = response.status_code
 
             # Handle status codes
+            if status_code == 204:
+                _logger.info(f"[ORDABLE] {endpoint} '{category_name}' '{method}' successfully.")
+                return {"response": None}
             if status_code not in (200, 201):
                 _logger.warning(f"[ORDABLE] Failed ({status_code}) for '{category_name}': {response.text}")
-                return {"error": f"HTTP {status_code}", "response": response.text}
+                return {"error": f"HTTP {status_code}", "response": response.text,
+                        "retry_after": self._get_retry_after(response)}
 
             # Try to parse JSON safely
             try:
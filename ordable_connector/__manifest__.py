@@ -17,7 +17,7 @@
     'version': '16.0.0.0.1',
     'license': 'LGPL-3',
     # any module necessary for this one to work correctly
-    'depends': ['mail', 'base', 'point_of_sale', 'sale','ordable_extra'],
+    'depends': ['mail', 'base', 'point_of_sale', 'sale','ordable_extra', 'base_external_ordable'],
 
     # always loaded
     'data': [
@@ -25,11 +25,15 @@
         'security/ir.model.access.csv',
         # Data (must load before views) - ORDABLE STATUS MAPPING
         'data/ordable_status_map_data.xml',
+        'data/ir_cron_data.xml',
         # Wizard
         # Views
         'views/ordable_brand_view.xml',
         'views/ordable_product.xml',
         'views/ordable_status_map_views.xml',  # ORDABLE STATUS MAPPING
+        'views/ordable_payment_method_map_views.xml',
+        'views/sale_order_views.xml',
+        'views/ordable_outbox_views.xml',
         # data
         'data/action.xml',
         'data/server_actions.xml',
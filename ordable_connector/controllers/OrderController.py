@@ -1,421 +1,23 @@
 from odoo import http
-from odoo.http import request, Response
-from datetime import datetime
-import requests
-import json
+from odoo.http import request
 import logging
-from odoo.exceptions import AccessError
-import re
 _logger = logging.getLogger(__name__)
 
 
 class OrderController(http.Controller):
 
-    def create_order(self, payment_data, brand):
-        tracking_id = payment_data.get('tracking_id')
-        api_token = brand.ordable_api_token
-        base_url = brand.ordable_base_url
-        url = f"{base_url}/orders?tracking_id={tracking_id}"
-        headers = {
-            'Authorization': api_token
-        }
-        try:
-            response = requests.request("GET", url, headers=headers)
-            response_data = response.json()
-            if (response_data.get('success')):
-                orders_data = response_data.get('data')
-                _logger.info(f"Order data retrieved successfully from Ordable with ID {tracking_id}.")
-                self.create_odoo_order(orders_data, payment_data, brand)
-            else:
-                _logger.error(f"Failed to retrieve Order data '{tracking_id}' from Ordable.")
-        except requests.exceptions.RequestException as e:
-            _logger.error(f"Failed to retrieve Order data '{tracking_id}' from Ordable: {e}")
-
-    def create_odoo_order(self, orders_data, payments_data, brand):
-        try:
-            for order_data in orders_data:
-                phone = order_data.get('phone', '').strip()
-                normalized_phone = re.sub(r'^\+965', '', phone)
-                partner = request.env['res.partner'].sudo().search([
-                    '|', '|', '|',
-                    ('phone', '=', phone),
-                    ('mobile', '=', phone),
-                    ('phone', '=', normalized_phone),
-                    ('mobile', '=', normalized_phone)
-                ], limit=1)
-                if not partner:
-                    partner = request.env['res.partner'].sudo().create({
-                        'name': order_data['customer_name'],
-                        'phone': order_data['phone'],
-                    })
-                    _logger.info(f"Created new partner: {partner.name} with phone {partner.phone}")
-                if brand.ordable_brand == "pos":
-                    self.create_pos_order(order_data, payments_data, partner, brand)
-                else:
-                    self.create_sale_order(order_data, payments_data, partner, brand)
-                    # Create payment for the sale order
-                    self.create_sale_order_payment(order_data, payments_data)
-
-            return {'success': True, 'message': "Order Created Successfully."}
-
-        except Exception as e:
-            _logger.error(f"Error in creating sale orders: {str(e)}")
-            return {'success': False, 'message': str(e)}
-
-    def create_sale_order(self, order_data, payments_data, partner, brand):
-        # Check if sale order already exists with the same ordable_id and ordable_tracking_id
-        existing_order = request.env['sale.order'].sudo().search([
-            ('ordable_id', '=', order_data['id']),
-            ('ordable_tracking_id', '=', order_data['tracking_id'])
-        ], limit=1)
-
-        if existing_order:
-            _logger.info(f"Sale Order already exists with ordable_id: {order_data['id']} and ordable_tracking_id: {order_data['tracking_id']}. Skipping creation.")
-            return {'success': True, 'sale_order_id': existing_order.id, 'already_exists': True}
-
-        sale_order_vals = {
-            'partner_id': partner.id,
-            'ordable_id': order_data['id'],
-            'ordable_tracking_id': order_data['tracking_id'],
-            'user_id': 1,
-            'company_id': 1,
-        }
-        sale_order = request.env['sale.order'].sudo().create(sale_order_vals)
-        for item in order_data.get('items', []):
-            product = request.env['product.product'].sudo().search([
-                ('name', '=', item['name'])
-            ], limit=1)
-            if not product:
-                product_template = request.env['product.template'].sudo().create({
-                    'name': item['name'],
-                    'list_price': item['price'],
-                    'categ_id': 1
-                })
-                product = product_template.product_variant_id
-
-            request.env['sale.order.line'].sudo().create({
-                'order_id': sale_order.id,
-                'product_id': product.id,
-                'product_uom_qty': item['quantity'],
-                'price_unit': item['price'],
-            })
-
-            # Optionally, create a separate line for each option (if each adds to total)
-            for option in item.get('options', []):
-                option_product = request.env['product.product'].sudo().search([
-                    ('name', '=', option['name'])
-                ], limit=1)
-                if not option_product:
-                    option_template = request.env['product.template'].sudo().create({
-                        'name': option['name'],
-                        'list_price': option['price'],
-                        'categ_id': 1
-                    })
-                    option_product = option_template.product_variant_id
-
-                request.env['sale.order.line'].sudo().create({
-                    'order_id': sale_order.id,
-                    'product_id': option_product.id,
-                    'product_uom_qty': option['quantity'],
-                    'price_unit': option['price'],
-                })
-
-        # Add delivery charge if applicable
-        is_delivery = order_data.get('is_delivery', False)
-        delivery_rate = order_data.get('delivery_rate', 0.0)
-
-        if is_delivery and delivery_rate > 0:
-            # Search for Delivery Charge product
-            delivery_product = request.env['product.product'].sudo().search([
-                ('name', '=', 'Delivery Charge'),
-                ('type', '=', 'service')
-            ], limit=1)
-
-            # Create Delivery Charge product if it doesn't exist
-            if not delivery_product:
-                delivery_template = request.env['product.template'].sudo().create({
-                    'name': 'Delivery Charge',
-                    'type': 'service',
-                    'list_price': delivery_rate,
-                    'categ_id': 1
-                })
-                delivery_product = delivery_template.product_variant_id
-                _logger.info(f"Created new Delivery Charge product with ID: {delivery_product.id}")
-
-            # Add delivery charge as a sale order line
-            request.env['sale.order.line'].sudo().create({
-                'order_id': sale_order.id,
-                'product_id': delivery_product.id,
-                'product_uom_qty': 1,
-                'price_unit': delivery_rate,
-            })
-            _logger.info(f"Added delivery charge of {delivery_rate} to Sale Order {sale_order.id}")
-
-        _logger.info(f"Sale Order created with ID: {sale_order.id}")
-
-        # Confirm the Sale Order
-        try:
-            sale_order.action_confirm()
-            _logger.info("Sale Order Confirmed with ID: %s", sale_order.id)
-        except Exception as e:
-            _logger.exception("Failed to confirm Sale Order ID %s: %s", sale_order.id, e)
-
-        return {'success': True, 'sale_order_id': sale_order.id}
-
-    def create_sale_order_payment(self, order_data, payments_data):
-        # Search for the sale order using ordable_id and ordable_tracking_id
-        sale_order = request.env['sale.order'].sudo().search([
-            ('ordable_id', '=', order_data['id']),
-            ('ordable_tracking_id', '=', order_data['tracking_id'])
-        ], limit=1)
-
-        if not sale_order:
-            _logger.error(f"Sale Order not found with ordable_id: {order_data['id']} and ordable_tracking_id: {order_data['tracking_id']}")
-            return {'success': False, 'message': 'Sale Order not found'}
-
-        _logger.info(f"Processing payment for Sale Order ID: {sale_order.id}")
-
-        # Check if sale order is confirmed, if not confirm it
-        if sale_order.state in ['draft', 'sent']:
-            try:
-                sale_order.action_confirm()
-                _logger.info(f"Sale Order {sale_order.id} confirmed successfully")
-            except Exception as e:
-                _logger.exception(f"Failed to confirm Sale Order {sale_order.id}: {e}")
-                return {'success': False, 'message': f'Failed to confirm sale order: {str(e)}'}
-
-        # Check if invoice exists, if not create it
-        if not sale_order.invoice_ids:
-            try:
-                # Create invoice
-                invoice = sale_order._create_invoices()
-                _logger.info(f"Invoice created for Sale Order {sale_order.id}: Invoice ID {invoice.id}")
-
-                # Post the invoice
-                invoice.action_post()
-                _logger.info(f"Invoice {invoice.id} posted successfully")
-            except Exception as e:
-                _logger.exception(f"Failed to create/post invoice for Sale Order {sale_order.id}: {e}")
-                return {'success': False, 'message': f'Failed to create invoice: {str(e)}'}
-
-        # Process each payment from the payment_data
-        for payment in payments_data.get('payments', []):
-            payment_method = payment.get('payment_method')
-            payment_amount = payment.get('amount')
-            payment_reference = payment.get('payment_reference', '')
-            payment_payid = payment.get('payment_payid', '')
-            payment_complete = payment.get('payment_complete', False)
-
-            if not payment_complete:
-                _logger.warning(f"Payment not complete for tracking_id: {payment.get('tracking_id')}. Skipping payment creation.")
-                continue
-
-            if not payment_method or payment_amount is None:
-                _logger.warning("Payment entry is missing method or amount. Skipping.")
-                continue
-
-            try:
-                # Find the appropriate payment journal based on payment method
-                journal = request.env['account.journal'].sudo().search([
-                    ('type', 'in', ['bank', 'cash', 'myfatoorah']),
-                    ('company_id', '=', sale_order.company_id.id)
-                ], limit=1)
-
-                if not journal:
-                    _logger.warning(f"No suitable journal found for payment method '{payment_method}'")
-                    continue
-
-                # Create the payment
-                payment_vals = {
-                    'payment_type': 'inbound',
-                    'partner_type': 'customer',
-                    'partner_id': sale_order.partner_id.id,
-                    'amount': payment_amount,
-                    'journal_id': journal.id,
-                    'ref': f"{payment_method} - Ref: {payment_reference} - PayID: {payment_payid}",
-                    'currency_id': sale_order.currency_id.id,
-                    'date': datetime.now(),
-                }
-
-                payment_record = request.env['account.payment'].sudo().create(payment_vals)
-                payment_record.action_post()
-
-                _logger.info(f"Payment created successfully for Sale Order {sale_order.id} with amount {payment_amount}")
-
-                # Reconcile the payment with the invoice if invoice exists
-                if sale_order.invoice_ids:
-                    invoice = sale_order.invoice_ids[0]
-                    lines_to_reconcile = payment_record.line_ids.filtered(lambda l: l.account_id == invoice.line_ids[0].account_id)
-                    invoice_lines = invoice.line_ids.filtered(lambda l: l.account_id == lines_to_reconcile[0].account_id)
-                    (lines_to_reconcile + invoice_lines).reconcile()
-                    _logger.info(f"Payment reconciled with invoice for Sale Order {sale_order.id}")
-
-            except Exception as e:
-                _logger.exception(f"Failed to create payment for Sale Order {sale_order.id}: {e}")
-                continue
-
-        return {'success': True, 'sale_order_id': sale_order.id}
-
-    def create_pos_order(self, order_data, payments_data, partner, brand):
-        # 1. SESSION, COMPANY, AND TAX ACQUISITION
-        pos_session = request.env['pos.session'].sudo().search([
-            ('state', '=', 'opened'),
-            ('config_id.name', '=', 'Call Center')
-        ], limit=1)
-
-        if not pos_session:
-            _logger.error("No active POS session found.")
-            return {'success': False, 'error': 'No active POS session found.'}
-
-        company_id = pos_session.config_id.company_id.id
-
-        # CRITICAL FIX 1: Find the 0% Sales Tax Record
-        # This record is mandatory for Odoo's calculation logic to run, even if tax amount is 0.
-        zero_tax = request.env['account.tax'].sudo().search([
-            ('company_id', '=', company_id),
-            ('type_tax_use', '=', 'sale'),
-            ('amount', '=', 0.0)
-        ], limit=1)
-
-        tax_ids_to_use = zero_tax.ids if zero_tax else []
-
-        if not zero_tax:
-            _logger.warning(f"No 0% Sales Tax record found for company ID {company_id}.")
-
-        # 2. POS ORDER CREATION
-        pos_order_vals = {
-            'partner_id': partner.id,
-            'session_id': pos_session.id,
-            'user_id': pos_session.user_id.id,
-            'company_id': company_id,
-            'pricelist_id': pos_session.config_id.pricelist_id.id,
-            'fiscal_position_id': partner.property_account_position_id.id or False,
-            'ordable_id': order_data.get('id'),
-            'ordable_tracking_id': order_data.get('tracking_id'),
-            'concept_id': brand.concept.id,
-            'amount_tax': 0.0,
-            'amount_total': order_data.get('total'),
-            'amount_paid': order_data.get('total'),
-            'amount_return': 0.0
-        }
-        pos_order = request.env['pos.order'].sudo().create(pos_order_vals)
-        _logger.info(f"Order reference: {pos_order.pos_reference}")
-        # 3. ORDER LINE CREATION (Finalized with all manual computed fields)
-        for item in order_data.get('items', []):
-            product = request.env['product.product'].sudo().search([
-                ('name', '=', item['name']),
-                ('product_tmpl_id.concept_ids', 'in', brand.concept.id)
-            ], limit=1)
-
-            # Product Creation Logic (Ensures product exists)
-            if not product:
-                product_template = request.env['product.template'].sudo().create({
-                    'name': item['name'],
-                    'list_price': item['price'],
-                    'categ_id': 1,
-                    'concept_ids': [(6, 0, [brand.concept.id])],
-                    'taxes_id': [(6, 0, tax_ids_to_use)],  # Link 0% tax to new product
-                })
-                product = product_template.product_variant_id
-
-            unit_price = item.get('price', 0)
-            quantity = item.get('quantity', 1)
-
-            # Manually calculate subtotal (since tax is 0% in Kuwait)
-            subtotal = unit_price * quantity
-
-            request.env['pos.order.line'].sudo().create({
-                'order_id': pos_order.id,
-                'product_id': product.id,
-                'qty': quantity,
-                'price_unit': unit_price,
-                'price_subtotal': subtotal,
-                'price_subtotal_incl': subtotal,
-                'tax_ids': [(6, 0, tax_ids_to_use)],
-                'full_product_name': product.display_name,
-            })
-
-            # Optional: create separate lines for each option
-            for option in item.get('options', []):
-                option_product = request.env['product.product'].sudo().search([
-                    ('name', '=', option['name']),
-                    ('product_tmpl_id.concept_ids', 'in', brand.concept.id)
-                ], limit=1)
-
-                if not option_product:
-                    option_template = request.env['product.template'].sudo().create({
-                        'name': option['name'],
-                        'list_price': option['price'],
-                        'categ_id': 1,
-                        'concept_ids': [(6, 0, [brand.concept.id])],
-                        'taxes_id': [(6, 0, tax_ids_to_use)],
-                    })
-                    option_product = option_template.product_variant_id
-
-                option_qty = option.get('quantity', 1)
-                option_price = option.get('price', 0)
-                option_subtotal = option_qty * option_price
-
-                request.env['pos.order.line'].sudo().create({
-                    'order_id': pos_order.id,
-                    'product_id': option_product.id,
-                    'qty': option_qty,
-                    'price_unit': option_price,
-                    'price_subtotal': option_subtotal,
-                    'price_subtotal_incl': option_subtotal,
-                    'tax_ids': [(6, 0, tax_ids_to_use)],
-                    'full_product_name': f"{product.display_name} - {option['name']}",
-                })
-        # 4. PAYMENT CREATION AND VALIDATION
-        for payment in payments_data.get('payments', []):
-            payment_method_name = payment.get('payment_method')
-            payment_amount = payment.get('amount')
-
-            if not payment_method_name or payment_amount is None:
-                _logger.warning("Payment entry is missing method or amount. Skipping.")
-                continue
-
-            payment_method = request.env['pos.payment.method'].sudo().search([
-                ('name', 'ilike', payment_method_name)
-            ], limit=1)
-
-            if not payment_method:
-                _logger.warning(f"Payment method '{payment_method_name}' not found. Skipping payment.")
-                continue
-
-            if not payment_method:
-                _logger.warning(f"Payment method '{payment_method_name}' not found. Skipping payment.")
-                continue
-            try:
-
-                payment_vals = {
-                    'amount': payment_amount,
-                    'payment_method_id': payment_method.id,
-                    'pos_order_id': pos_order.id,
-                    'name': f"{payment_method_name} Ref: {payment.get('payment_reference', '')}",
-                }
-
-                request.env['pos.payment'].sudo().create(payment_vals)
-            except Exception as e:
-                _logger.exception(f"Failed to add payment to POS order ID {pos_order.id}: {e}")
-        # Final validation
-        try:
-            pos_order.action_pos_order_paid()
-            _logger.info(f"POS Order created and validated with ID: {pos_order.id}")
-        except Exception as e:
-            _logger.exception(f"Failed to confirm POS order ID {pos_order.id}: {e}")
-            return {'success': False, 'error': f"Order validation failed: {e}"}
-
-        return {'success': True, 'pos_order_id': pos_order.id}
-
     @http.route('/ordable/payment2', type='http', auth='public', website=True, cors="*", methods=["POST"], csrf=False)
     def ordable_payment(self, **kwargs):
+        """
+        Store the payment in the webhook inbox and answer right away; the
+        order is fetched from Ordable and imported in the background (see
+        ordable.webhook.inbox).
+        """
         try:
-            _logger.info(
-                f'========= Data received from ordable payment webhook {kwargs} {request.get_json_data()} {request.params}===============')
             payment_data = request.get_json_data()
+            _logger.info(f"========= Payment webhook received from Ordable: brand {kwargs.get('brand')}, tracking {payment_data.get('tracking_id')} ===============")
             brand_id = kwargs.get('brand')
-            brand = request.env['ordable.brand'].sudo().search([('branch', '=', brand_id)], limit=1)
+            brand = request.env['ordable.brand'].sudo()._get_brand_by_branch(brand_id)
             if not brand:
                 _logger.warning("Brand not available")
                 return request.make_json_response({
@@ -423,16 +25,14 @@ class OrderController(http.Controller):
                     'message': 'Brand ID missing'
                 }, status=400)
 
-            self.create_order(payment_data, brand)
-
+            request.env['ordable.webhook.inbox'].sudo()._receive('payment', brand, payment_data)
             return request.make_json_response({
-                'status': 'success',
+                'status': 'accepted',
                 'message': 'Data successfully submitted!'
-            })
-
+            }, status=202)
         except Exception as e:
+            _logger.exception("Failed to store Ordable payment webhook")
             return request.make_json_response({
                 'status': 'error',
                 'message': str(e)
-            })
-
+            }, status=500)
@@ -21,13 +21,13 @@ class OrdableController(http.Controller):
     @http.route('/ordable/sync_options', type='http', auth='user', methods=['GET'], csrf=False)
     def sync_ordable_options(self, **kwargs):
         """
-        Trigger the sync_products_from_ordable function manually via GET request.
+        Trigger the sync_options_from_ordable function manually via GET request.
         """
         try:
-            request.env['ordable.product'].sudo().sync_products_from_ordable()
-            return "✅ Ordable products sync executed successfully."
+            request.env['ordable.product.option'].sudo().sync_options_from_ordable()
+            return "✅ Ordable options sync executed successfully."
         except Exception as e:
-            _logger.error(f"❌ Error syncing Ordable products: {str(e)}")
+            _logger.error(f"❌ Error syncing Ordable options: {str(e)}")
             return f"❌ Error: {str(e)}"
 
     @http.route('/ordable/sync_orders', type='http', auth='user', methods=['GET'], csrf=False)
@@ -1,7 +1,21 @@
 # -*- coding: utf-8 -*-
 
 from . import ordable_brand
+from . import ordable_catalogue
+from . import ordable_catalogue_index
 from . import ordable_product
+from . import ordable_product_option
 from . import ordable_status_map  # ORDABLE STATUS MAPPING - Added 2026-02-09
+from . import ordable_payment_method_map
+from . import ordable_outbox
+from . import ordable_order_import
+from . import ordable_webhook_inbox
+from . import ordable_push_record
+from . import ordable_push
+from . import pos_category
+from . import product_template
 from . import pos_order
+from . import pos_session
+from . import account_tax
+from . import res_partner
 from . import sale
\ No newline at end of file
@@ -0,0 +1,25 @@
+from odoo import api, models
+
+# Fields the cached zero tax of the Ordable order import depends on
+TAX_REFERENCE_FIELDS = {'amount', 'type_tax_use', 'company_id', 'active'}
+
+
+class AccountTax(models.Model):
+    _inherit = 'account.tax'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        taxes = super().create(vals_list)
+        self.clear_caches()
+        return taxes
+
+    def write(self, vals):
+        result = super().write(vals)
+        if TAX_REFERENCE_FIELDS & set(vals):
+            self.clear_caches()
+        return result
+
+    def unlink(self):
+        result = super().unlink()
+        self.clear_caches()
+        return result
@@ -1,5 +1,20 @@
 import logging
-from odoo import api, models, fields, _
+from collections import namedtuple
+from odoo import api, models, fields, tools, _
+
+# Immutable snapshot of a brand, cached per registry. It exposes the same
+# attribute names as the record for everything ordable.api reads, so it can be
+# handed to the HTTP client directly.
+BrandInfo = namedtuple('BrandInfo', [
+    'id', 'name', 'branch', 'concept_id', 'company_id',
+    'ordable_base_url', 'ordable_api_token', 'sync_ordable_info', 'ordable_brand',
+    'ordable_connect_timeout', 'ordable_timeout', 'ordable_deadline',
+    'ordable_breaker_threshold', 'ordable_breaker_cooldown',
+    'ordable_rate_limit', 'ordable_rate_burst',
+])
+# Fields of the model the snapshot is built from; the record's concept is
+# exposed as concept_id, like the other many2ones
+BRAND_CACHED_FIELDS = (set(BrandInfo._fields) - {'id', 'concept_id'}) | {'concept'}
 
 class OrdableBrand(models.Model):
     _name = "ordable.brand"
@@ -7,13 +22,135 @@ class OrdableBrand(models.Model):
     name = fields.Char(string="Name", required=True)
     ordable_api_token = fields.Char(string="Ordable API Token", required=True)
     ordable_base_url = fields.Char(string="Ordable Base URL", required=True)
-    branch = fields.Char(string="Branch", required=True)
+    branch = fields.Char(string="Branch", required=True, index=True)
     concept = fields.Many2one("res.concept", string="Concept")
     sync_ordable_info = fields.Boolean("Is Sync Ordable")
     ordable_brand = fields.Selection([('pos', 'POS Order'), ('sale', 'Sale Order')], string="Ordable Brand", default="pos")
+    ordable_defer_sale_processing = fields.Boolean(
+        string="Deferred Order Processing",
+        help="Only create draft sale orders when importing; a scheduled action confirms, invoices "
+             "and pays them by batches.")
     company_id = fields.Many2one(
         'res.company',
         string='Company',
         default=lambda self: self.env.company,
         required=True
-    )
\ No newline at end of file
+    )
+    ordable_connect_timeout = fields.Integer(string="Connect Timeout (s)", default=5)
+    ordable_timeout = fields.Integer(string="Read Timeout (s)", default=30)
+    ordable_deadline = fields.Integer(string="Bulk Sync Deadline (s)",
+                                      help="Time budget of one bulk sync run for this brand. 0 means no limit.")
+    ordable_breaker_threshold = fields.Integer(string="Circuit Failure Threshold", default=5,
+                                               help="Consecutive failures that open an endpoint's circuit")
+    ordable_breaker_cooldown = fields.Integer(string="Circuit Cool-down (s)", default=60,
+                                              help="Time an open circuit waits before letting a probe through")
+    ordable_rate_limit = fields.Float(string="Rate Limit (req/s)",
+                                      help="Requests per second allowed for this brand's token. 0 means unlimited; "
+                                           "Ordable's 429/Retry-After answers are honored either way.")
+    ordable_rate_burst = fields.Integer(string="Rate Burst", default=10)
+    ordable_circuit_state = fields.Char(string="Circuit State", compute="_compute_ordable_circuit_state",
+                                        help="Circuit breakers of this brand in the current worker")
+    # High-water mark of the bulk order sync: (write_date, id) of the last order handled
+    ordable_order_sync_date = fields.Datetime(string="Orders Synced Up To", copy=False)
+    ordable_order_sync_id = fields.Integer(string="Last Synced Order ID", copy=False)
+    # Validators of the last complete catalogue fetch, sent back to skip unchanged catalogues
+    ordable_products_etag = fields.Char(string="Products ETag", copy=False)
+    ordable_products_modified = fields.Char(string="Products Last-Modified", copy=False)
+    ordable_options_etag = fields.Char(string="Options ETag", copy=False)
+    ordable_options_modified = fields.Char(string="Options Last-Modified", copy=False)
+
+    def _compute_ordable_circuit_state(self):
+        Api = self.env['ordable.api']
+        for brand in self:
+            states = Api._get_circuit_states(brand) if brand.ordable_base_url else {}
+            brand.ordable_circuit_state = ", ".join(
+                f"{endpoint}: {state}" + (f" (retry in {retry_after}s)" if retry_after else "")
+                for endpoint, (state, retry_after) in sorted(states.items())
+            ) or "closed"
+
+    def _partition_by_concept(self):
+        """
+        Split brands into lists of ids sharing a concept. Order and catalogue
+        data is keyed by concept, so two partitions never write the same rows.
+        """
+        partitions = {}
+        for brand in self:
+            partitions.setdefault(brand.concept.id, []).append(brand.id)
+        return list(partitions.values())
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.clear_caches()
+        return records
+
+    def write(self, vals):
+        result = super().write(vals)
+        if set(vals) & BRAND_CACHED_FIELDS:
+            self.clear_caches()
+        return result
+
+    def unlink(self):
+        result = super().unlink()
+        self.clear_caches()
+        return result
+
+    @api.model
+    @tools.ormcache()
+    def _get_brand_registry(self):
+        """
+        Return all brands indexed by id, branch and concept. Cached per registry
+        and cleared when a brand is created, deleted or one of the cached fields
+        is written.
+        """
+        by_id, by_branch, by_concept = {}, {}, {}
+        for brand in self.sudo().search([], order='id'):
+            info = BrandInfo(
+                id=brand.id,
+                name=brand.name,
+                branch=brand.branch,
+                concept_id=brand.concept.id,
+                company_id=brand.company_id.id,
+                ordable_base_url=brand.ordable_base_url,
+                ordable_api_token=brand.ordable_api_token,
+                sync_ordable_info=brand.sync_ordable_info,
+                ordable_brand=brand.ordable_brand,
+                ordable_connect_timeout=brand.ordable_connect_timeout,
+                ordable_timeout=brand.ordable_timeout,
+                ordable_deadline=brand.ordable_deadline,
+                ordable_breaker_threshold=brand.ordable_breaker_threshold,
+                ordable_breaker_cooldown=brand.ordable_breaker_cooldown,
+                ordable_rate_limit=brand.ordable_rate_limit,
+                ordable_rate_burst=brand.ordable_rate_burst,
+            )
+            by_id[info.id] = info
+            by_branch.setdefault(info.branch, info)
+            by_concept.setdefault(info.concept_id, []).append(info)
+        return {
+            'by_id': tools.frozendict(by_id),
+            'by_branch': tools.frozendict(by_branch),
+            'by_concept': tools.frozendict({key: tuple(infos) for key, infos in by_concept.items()}),
+        }
+
+    @api.model
+    def _get_brand_info(self, brand_id):
+        return self._get_brand_registry()['by_id'].get(brand_id)
+
+    @api.model
+    def _find_brand_info(self, branch=None, concept_id=None, sync_only=False):
+        """First cached brand matching the branch or concept, or None."""
+        registry = self._get_brand_registry()
+        if branch is not None:
+            infos = [registry['by_branch'].get(branch)]
+        else:
+            infos = registry['by_concept'].get(concept_id, ())
+        for info in infos:
+            if info and (info.sync_ordable_info or not sync_only):
+                return info
+        return None
+
+    @api.model
+    def _get_brand_by_branch(self, branch):
+        """Brand record for a webhook branch id, without searching the table."""
+        info = self._find_brand_info(branch=branch)
+        return self.browse(info.id) if info else self.browse()
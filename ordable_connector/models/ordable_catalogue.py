@@ -0,0 +1,219 @@
+import logging
+from odoo import api, models, fields, tools, _
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOGUE_PAGE_SIZE = 500
+
+
+class OrdableCatalogueMixin(models.AbstractModel):
+    """
+    Common fields, paged fetch and bulk upsert for the per-concept copies of
+    the Ordable catalogue (products, options). Records are keyed by
+    (concept, ordable_id).
+    """
+    _name = "ordable.catalogue.mixin"
+    _description = "Ordable Catalogue Mixin"
+
+    # Fields filled by _prepare_ordable_vals, compared before writing
+    _ordable_sync_fields = ["name", "product_id"]
+    # Fields only set while empty: a link made by hand, or to a product
+    # renamed since, is never replaced by name matching
+    _ordable_fill_only_fields = {"product_id"}
+    # API endpoint listing the catalogue, and the ordable.brand fields keeping
+    # its ETag / Last-Modified validators for conditional requests
+    _ordable_endpoint = None
+    _ordable_etag_field = None
+    _ordable_modified_field = None
+
+    name = fields.Char(string="Name")
+    concept = fields.Many2one("res.concept", string="Concept")
+    ordable_id = fields.Integer(string="ordable_id")
+    active = fields.Boolean(string="Active", default=True)
+    # Odoo product this Ordable item stands for; matched by name during the
+    # catalogue sync when not set, then used by both order directions
+    product_id = fields.Many2one("product.product", string="Odoo Product", ondelete="set null")
+
+    _sql_constraints = [
+        ('concept_ordable_id_uniq', 'unique(concept, ordable_id)',
+         'An Ordable id can only appear once per concept!'),
+    ]
+
+    def init(self):
+        super().init()
+        if self._abstract:
+            return
+        # The unique constraint covers (concept, ordable_id); name and product
+        # lookups are per concept too
+        tools.create_index(self._cr, f'{self._table}_concept_name_index', self._table, ['concept', 'name'])
+        tools.create_index(
+            self._cr, f'{self._table}_concept_product_index', self._table,
+            ['concept', 'product_id'], where='product_id IS NOT NULL')
+
+    @api.model
+    def _prepare_ordable_page(self, concept, items):
+        """Data shared by every item of a page (e.g. prefetched links), passed to _prepare_ordable_vals."""
+        names = [item.get("name") for item in items if item.get("name")]
+        return {'odoo_products': self.env['ordable.catalogue.index']._lookup('product.product', concept.id, names)}
+
+    @api.model
+    def _prepare_ordable_vals(self, item, page_data):
+        """Values to store for one item of the Ordable API answer."""
+        return {
+            "name": item.get("name"),
+            "product_id": page_data['odoo_products'].get(item.get("name"), False),
+        }
+
+    @api.model
+    def _upsert_from_ordable(self, concept, items, seen=None):
+        """
+        Create or update the concept's records from one page of the Ordable
+        API answer in a handful of queries: existing rows are loaded once, new
+        ones are created in a single batch and only rows that actually changed
+        are written. Archived rows coming back upstream are reactivated.
+
+        The ordable ids handled are added to ``seen`` when given.
+        Returns a dict with the created/updated/unchanged counts.
+        """
+        seen = set() if seen is None else seen
+        ids = {item.get("id") for item in items if item.get("id")}
+        existing = {}
+        rows = self.with_context(active_test=False).search_read(
+            [("concept", "=", concept.id), ("ordable_id", "in", list(ids))],
+            ["ordable_id", "active"] + self._ordable_sync_fields, order="id", load=None)
+        for row in rows:
+            # First row wins if the concept has duplicates
+            existing.setdefault(row["ordable_id"], row)
+
+        page_data = self._prepare_ordable_page(concept, items)
+        to_create = []
+        to_write = []
+        handled = set()
+        for item in items:
+            ordable_id = item.get("id")
+            if not ordable_id or ordable_id in handled:
+                continue
+            handled.add(ordable_id)
+            vals = self._prepare_ordable_vals(item, page_data)
+            row = existing.get(ordable_id)
+            if row is None:
+                to_create.append(dict(vals, concept=concept.id, ordable_id=ordable_id))
+                continue
+            changes = {
+                key: value for key, value in vals.items()
+                if row[key] != value and not (key in self._ordable_fill_only_fields and row[key])
+            }
+            if not row["active"]:
+                changes["active"] = True
+            if changes:
+                to_write.append((row["id"], changes))
+
+        if to_create:
+            self.create(to_create)
+        for record_id, changes in to_write:
+            self.browse(record_id).write(changes)
+        seen.update(handled)
+
+        return {
+            "created": len(to_create),
+            "updated": len(to_write),
+            "unchanged": len(handled) - len(to_create) - len(to_write),
+        }
+
+    @api.model
+    def _archive_missing_from_ordable(self, concept, seen):
+        """Archive the concept's records whose ordable id is not in ``seen``. Returns their count."""
+        missing = self.search([("concept", "=", concept.id), ("ordable_id", "not in", list(seen))])
+        missing.write({"active": False})
+        return len(missing)
+
+    @api.model
+    def _ordable_archive_missing(self):
+        """Whether a full catalogue sync archives the records Ordable no longer returns."""
+        value = self.env['ir.config_parameter'].sudo().get_param('ordable.catalogue_archive_missing', 'False')
+        return value.strip().lower() in ('1', 'true', 'yes')
+
+    @api.model
+    def _ordable_page_size(self):
+        value = self.env['ir.config_parameter'].sudo().get_param(
+            'ordable.catalogue_page_size', str(DEFAULT_CATALOGUE_PAGE_SIZE))
+        try:
+            return max(int(value), 1)
+        except ValueError:
+            return DEFAULT_CATALOGUE_PAGE_SIZE
+
+    @api.model
+    def _sync_brand_from_ordable(self, brand):
+        """
+        Page through the brand's catalogue and upsert each page as it arrives,
+        emptying the env cache in between so memory stays flat on big menus.
+
+        The request is conditional with the validators saved on the brand by
+        the last complete run: a 304 answer skips the sync. Validators only
+        describe the page they came with, so they are only kept when the
+        whole catalogue fit in one page; bigger catalogues are always fetched
+        in full. Validators are only saved, and missing records archived,
+        once every page went through.
+
+        Returns the counts, {} when the catalogue is unchanged, or None when
+        the fetch failed.
+        """
+        Api = self.env['ordable.api']
+        page_size = self._ordable_page_size()
+        headers = {}
+        if brand[self._ordable_etag_field]:
+            headers['If-None-Match'] = brand[self._ordable_etag_field]
+        if brand[self._ordable_modified_field]:
+            headers['If-Modified-Since'] = brand[self._ordable_modified_field]
+
+        totals = {"created": 0, "updated": 0, "unchanged": 0, "archived": 0}
+        validators = {}
+        seen = set()
+        page = 1
+        while True:
+            response = Api._request(
+                brand, 'GET', self._ordable_endpoint, deadline=Api._get_deadline(brand),
+                params={'page': page, 'page_size': page_size}, headers=headers if page == 1 else None)
+            if page == 1 and response.status_code == 304:
+                _logger.info(f"⏭️ {self._ordable_endpoint} unchanged for {brand.name}, skipping")
+                return {}
+            if response.status_code != 200:
+                _logger.warning(f"Failed for {brand.name} - {self._ordable_endpoint} page {page} - Status {response.status_code}")
+                return None
+            data = response.json()
+            if not data.get("success"):
+                _logger.warning(f"Invalid response for {brand.name}: {data}")
+                return None
+            if page == 1:
+                validators = {
+                    self._ordable_etag_field: response.headers.get('ETag') or False,
+                    self._ordable_modified_field: response.headers.get('Last-Modified') or False,
+                }
+
+            items = data.get("data", [])
+            # Stop after a short page, an explicit end, or a page bringing
+            # nothing new (the endpoint ignoring the paging parameters)
+            last_page = len(items) < page_size or not data.get("next", True)
+            known = len(seen)
+            # Page 2 repeating page 1: the first answer was the whole catalogue
+            ignores_paging = page == 2 and bool(items)
+            counts = self._upsert_from_ordable(brand.concept, items, seen)
+            for key, value in counts.items():
+                totals[key] += value
+            del data, items, response
+            self.env.flush_all()
+            self.env.invalidate_all()
+
+            if last_page or len(seen) == known:
+                single_page = page == 1 or (ignores_paging and len(seen) == known)
+                break
+            page += 1
+
+        # An empty answer is more likely an upstream hiccup than an empty menu
+        if seen and self._ordable_archive_missing():
+            totals["archived"] = self._archive_missing_from_ordable(brand.concept, seen)
+        if not single_page:
+            # A 304 on the first page would say nothing about the next ones
+            validators = dict.fromkeys(validators, False)
+        brand.write(validators)
+        return totals
@@ -0,0 +1,187 @@
+import json
+import logging
+import select
+import threading
+import time
+
+import odoo
+from odoo import api, models, tools, _
+
+_logger = logging.getLogger(__name__)
+
+# Postgres channel announcing catalogue changes to every worker of a database
+CATALOGUE_CHANNEL = 'ordable_catalogue'
+LISTEN_TIMEOUT = 60
+LISTEN_RETRY_DELAY = 10
+# Postgres rejects notification payloads of 8000 bytes or more
+NOTIFY_MAX_PAYLOAD = 7900
+
+# {(dbname, model, lang): {concept_id: {name: value}}}, per process
+_indexes = {}
+_indexes_lock = threading.Lock()
+# Bumped on every invalidation of a database, so a load that raced with a
+# change does not store its stale result
+_generations = {}
+# {dbname: listener thread}; the index of a database is only used while its
+# listener is connected, otherwise lookups go to the database
+_listeners = {}
+_listening = set()
+
+
+def _invalidate(dbname, changes=None):
+    """Drop the given [model, concept_id] entries of a database, or all of them."""
+    with _indexes_lock:
+        _generations[dbname] = _generations.get(dbname, 0) + 1
+        for (db, model, lang), concepts in _indexes.items():
+            if db != dbname:
+                continue
+            if changes is None:
+                concepts.clear()
+                continue
+            for changed_model, concept_id in changes:
+                if changed_model != model:
+                    continue
+                if concept_id is None:
+                    concepts.clear()
+                else:
+                    concepts.pop(concept_id, None)
+
+
+def _listen(dbname):
+    while True:
+        try:
+            with odoo.sql_db.db_connect(dbname).cursor() as cr:
+                connection = cr._cnx
+                cr.execute(f"LISTEN {CATALOGUE_CHANNEL}")
+                cr.commit()
+                # Changes may have been missed while not listening
+                _invalidate(dbname)
+                _listening.add(dbname)
+                while True:
+                    if select.select([connection], [], [], LISTEN_TIMEOUT) == ([], [], []):
+                        continue
+                    connection.poll()
+                    changes = []
+                    while connection.notifies:
+                        changes.extend(json.loads(connection.notifies.pop().payload))
+                    _invalidate(dbname, [tuple(change) for change in changes])
+        except Exception:
+            _logger.exception(f"[ORDABLE] Catalogue listener of {dbname} failed, reconnecting")
+        finally:
+            _listening.discard(dbname)
+            _invalidate(dbname)
+        time.sleep(LISTEN_RETRY_DELAY)
+
+
+class OrdableCatalogueIndex(models.AbstractModel):
+    """
+    Per-worker in-memory index of the catalogue: concept -> name -> id, for
+    the Ordable products (outbound payloads) and the Odoo products of each
+    concept (inbound orders).
+
+    Concepts are loaded lazily with one query. Writes on the indexed models
+    send a NOTIFY on commit and every worker listening on the database drops
+    the concepts concerned, so lookups mostly skip the database and never
+    outlive a committed change for long.
+    """
+    _name = "ordable.catalogue.index"
+    _description = "Ordable Catalogue Index"
+
+    # ------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------
+
+    @api.model
+    def _lookup(self, model_name, concept_id, names):
+        """{name: value} of the given names for the concept, values as returned by the model's loader."""
+        index = self._get_concept_index(model_name, concept_id)
+        return {name: index[name] for name in set(names) if name in index}
+
+    @api.model
+    def _get_concept_index(self, model_name, concept_id):
+        dbname = self.env.cr.dbname
+        if not self._is_index_enabled():
+            return self._load_concept(model_name, concept_id)
+
+        key = (dbname, model_name, self.env.lang)
+        concepts = _indexes.get(key)
+        index = concepts.get(concept_id) if concepts is not None else None
+        if index is not None:
+            return index
+
+        generation = _generations.get(dbname, 0)
+        index = self._load_concept(model_name, concept_id)
+        with _indexes_lock:
+            if _generations.get(dbname, 0) == generation:
+                _indexes.setdefault(key, {})[concept_id] = index
+        return index
+
+    @api.model
+    def _is_index_enabled(self):
+        # Test transactions are never committed, nothing would invalidate the index
+        if getattr(threading.current_thread(), 'testing', False) or tools.config['test_enable']:
+            return False
+        dbname = self.env.cr.dbname
+        if dbname not in _listeners or not _listeners[dbname].is_alive():
+            with _indexes_lock:
+                if dbname not in _listeners or not _listeners[dbname].is_alive():
+                    thread = threading.Thread(
+                        target=_listen, args=(dbname,), name=f'ordable_catalogue_{dbname}', daemon=True)
+                    _listeners[dbname] = thread
+                    thread.start()
+        return dbname in _listening
+
+    @api.model
+    def _load_concept(self, model_name, concept_id):
+        if model_name == 'ordable.product':
+            records = self.env['ordable.product'].sudo().search_read(
+                [('concept', '=', concept_id)], ['name', 'ordable_id'], order='id')
+            value_field = 'ordable_id'
+        elif model_name == 'product.product':
+            records = self.env['product.product'].sudo().search_read(
+                [('product_tmpl_id.concept_ids', 'in', concept_id)], ['name'], order='id')
+            value_field = 'id'
+        else:
+            raise ValueError(f"No catalogue index for {model_name}")
+        # First record of a name wins, like search(..., limit=1) by id
+        index = {}
+        for record in records:
+            if record['name']:
+                index.setdefault(record['name'], record[value_field])
+        return index
+
+    # ------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------
+
+    @api.model
+    def _notify_change(self, model_name, concept_ids=None):
+        """
+        Invalidate the model's index for the concepts (all when None) in every
+        worker once the current transaction commits. Changes of a transaction
+        are sent as one notification.
+        """
+        cr = self.env.cr
+        if 'ordable.catalogue.changes' not in cr.precommit.data:
+            changes = cr.precommit.data['ordable.catalogue.changes'] = set()
+            dbname = cr.dbname
+
+            @cr.precommit.add
+            def notify():
+                if not changes:
+                    return
+                payload = sorted(changes, key=str)
+                message = json.dumps(payload)
+                if len(message) > NOTIFY_MAX_PAYLOAD:
+                    payload = sorted({(model, None) for model, concept_id in payload})
+                    message = json.dumps(payload)
+                cr.execute("SELECT pg_notify(%s, %s)", [CATALOGUE_CHANNEL, message])
+                # This worker does not wait for its own listener
+                cr.postcommit.add(lambda: _invalidate(dbname, payload))
+                changes.clear()
+
+        changes = cr.precommit.data['ordable.catalogue.changes']
+        if concept_ids is None:
+            changes.add((model_name, None))
+        else:
+            changes.update((model_name, concept_id) for concept_id in concept_ids)
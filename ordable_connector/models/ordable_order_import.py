@@ -0,0 +1,752 @@
+import json
+import logging
+from datetime import datetime, timedelta
+
+from psycopg2 import errorcodes, IntegrityError
+
+from odoo import api, models, fields, tools, _
+
+_logger = logging.getLogger(__name__)
+
+# First key of the advisory locks taken while importing an Ordable order,
+# the second one being the hash of its tracking id
+ORDER_LOCK_NAMESPACE = 218934110
+# POS config receiving the Ordable orders of POS brands
+CALL_CENTER_CONFIG_NAME = 'Call Center'
+DELIVERY_PRODUCT_NAME = 'Delivery Charge'
+# Deferred sale orders: confirmed and invoiced by batches of this size,
+# the first run starting this long after an order arrives so a few pile up
+SALE_PROCESSING_BATCH_SIZE = 100
+SALE_PROCESSING_DELAY_SECONDS = 60
+
+
+def _create_tracking_unique_index(cr, table):
+    """
+    Unique partial index on (ordable_tracking_id, ordable_id) of an order
+    table, replacing the plain lookup index of earlier versions. While the
+    table still holds duplicates the plain index is kept and a warning
+    names them, so they can be merged by hand before the next update.
+    """
+    index = f'{table}_ordable_tracking_uniq'
+    legacy_index = f'{table}_ordable_tracking_index'
+    if not tools.index_exists(cr, index):
+        cr.execute(f"""
+            SELECT ordable_tracking_id, ordable_id, count(*)
+              FROM "{table}"
+             WHERE ordable_tracking_id IS NOT NULL
+          GROUP BY ordable_tracking_id, ordable_id
+            HAVING count(*) > 1
+             LIMIT 10
+        """)
+        duplicates = cr.fetchall()
+        if duplicates:
+            _logger.warning(
+                f"[ORDABLE] {table} holds duplicated Ordable orders {duplicates}, "
+                f"unique index {index} not created")
+            tools.create_index(
+                cr, legacy_index, table, ['ordable_tracking_id', 'ordable_id'],
+                where='ordable_tracking_id IS NOT NULL')
+            return
+        cr.execute(f"""
+            CREATE UNIQUE INDEX "{index}" ON "{table}" (ordable_tracking_id, ordable_id)
+             WHERE ordable_tracking_id IS NOT NULL
+        """)
+    tools.drop_index(cr, legacy_index, table)
+
+
+class OrdableOrderImport(models.AbstractModel):
+    """
+    Turn Ordable webhooks into Odoo orders. Called by ordable.webhook.inbox
+    in the background, never from the HTTP request itself.
+
+    Two webhooks feed it: /ordable/order/create carries the order itself,
+    /ordable/payment2 carries payments only and the order is fetched from
+    Ordable by tracking id.
+    """
+    _name = "ordable.order.import"
+    _description = "Ordable Order Import"
+
+    # ------------------------------------------------------------
+    # Webhook entry points
+    # ------------------------------------------------------------
+
+    @api.model
+    def _import_order_webhook(self, data, brand):
+        partner = self._get_or_create_partner(data)
+        if brand.ordable_brand == "pos":
+            return self._create_pos_order(data, data.get('payments', []), partner, brand)
+        result = self._create_sale_order(data, partner, brand)
+        # Check if payment is complete and create invoice
+        if result.get('success') and 'sale_order_id' in result and not result.get('already_exists') \
+                and data.get('payment_complete'):
+            sale_order = self.env['sale.order'].browse(result['sale_order_id'])
+            if result.get('deferred'):
+                sale_order.ordable_pay_on_process = True
+            else:
+                self._sale_order_invoice_payment(sale_order)
+        return result
+
+    @api.model
+    def _import_payment_webhook(self, payment_data, brand):
+        tracking_id = payment_data.get('tracking_id')
+        response = self.env['ordable.api']._request(brand, 'GET', 'orders', params={'tracking_id': tracking_id})
+        response_data = response.json()
+        if not response_data.get('success'):
+            _logger.error(f"Failed to retrieve Order data '{tracking_id}' from Ordable.")
+            return {'success': False, 'error': f"Order '{tracking_id}' not found on Ordable"}
+        _logger.info(f"Order data retrieved successfully from Ordable with ID {tracking_id}.")
+
+        results = []
+        for order_data in response_data.get('data') or []:
+            partner = self._get_or_create_partner(order_data)
+            if brand.ordable_brand == "pos":
+                results.append(self._create_pos_order(
+                    order_data, payment_data.get('payments', []), partner, brand))
+            else:
+                result = self._create_sale_order(order_data, partner, brand)
+                if result.get('success') and 'sale_order_id' in result:
+                    # Create payment for the sale order
+                    sale_order = self.env['sale.order'].browse(result['sale_order_id'])
+                    if self._defer_sale_order_payments(sale_order, payment_data.get('payments', [])):
+                        result = {'success': True, 'sale_order_id': sale_order.id, 'deferred': True}
+                    else:
+                        result = self._create_sale_order_payment(sale_order, payment_data.get('payments', []))
+                results.append(result)
+        failed = [result for result in results if not result.get('success')]
+        if failed:
+            return failed[0]
+        return {
+            'success': True,
+            'in_progress': any(result.get('in_progress') for result in results),
+            'results': results,
+        }
+
+    # ------------------------------------------------------------
+    # Idempotency
+    # ------------------------------------------------------------
+
+    @api.model
+    def _claim_ordable_order(self, model_name, order_data):
+        """
+        Make sure this transaction is the only one importing the order.
+
+        Returns (claimed, existing): ``existing`` is the order already imported,
+        found with one probe of the unique (tracking id, ordable id) index.
+        ``claimed`` is False when another transaction is importing the same
+        tracking id right now; that copy is left alone instead of waiting on
+        it, its own inbox row being retried if it fails.
+        """
+        Order = self.env[model_name].sudo()
+        existing = Order.search([
+            ('ordable_tracking_id', '=', order_data.get('tracking_id')),
+            ('ordable_id', '=', order_data.get('id')),
+        ], limit=1)
+        if existing or not order_data.get('tracking_id'):
+            return True, existing
+        self.env.cr.execute(
+            "SELECT pg_try_advisory_xact_lock(%s, hashtext(%s))",
+            [ORDER_LOCK_NAMESPACE, order_data['tracking_id']])
+        if not self.env.cr.fetchone()[0]:
+            return False, Order
+        # The copy holding the lock may have committed between the probe and the lock
+        return True, Order.search([
+            ('ordable_tracking_id', '=', order_data.get('tracking_id')),
+            ('ordable_id', '=', order_data.get('id')),
+        ], limit=1)
+
+    @api.model
+    def _create_ordable_order(self, model_name, vals):
+        """
+        Create the order, or return the existing one when the unique index
+        says it was imported concurrently (a copy outside the advisory lock,
+        e.g. created by hand).
+        """
+        Order = self.env[model_name].sudo()
+        try:
+            with self.env.cr.savepoint():
+                return Order.create(vals), False
+        except IntegrityError as e:
+            if e.pgcode != errorcodes.UNIQUE_VIOLATION:
+                raise
+            existing = Order.search([
+                ('ordable_tracking_id', '=', vals.get('ordable_tracking_id')),
+                ('ordable_id', '=', vals.get('ordable_id')),
+            ], limit=1)
+            if not existing:
+                raise
+            return existing, True
+
+    # ------------------------------------------------------------
+    # Customers and products
+    # ------------------------------------------------------------
+
+    @api.model
+    def _get_or_create_partner(self, order_data):
+        Partner = self.env['res.partner'].sudo()
+        partner = Partner._find_by_ordable_phone(order_data.get('phone'))
+        if not partner:
+            partner = Partner.create({
+                'name': order_data.get('customer_name'),
+                'phone': order_data.get('phone'),
+                'country_id': self.env.ref('base.kw').id,
+            })
+            _logger.info(f"Created new partner: {partner.name} with phone {partner.phone}")
+        return partner
+
+    @api.model
+    def _get_order_products(self, brand, items, tax_ids=None):
+        """
+        Resolve the products of every item and option of an order at once.
+
+        Lines are matched on the product linked to their Ordable id first,
+        then by name: within the brand's concept for POS brands (``tax_ids``
+        given), among all products for sale brands. Products still missing
+        are created in one batch. Returns a function giving the product of
+        a line, ``product_of(line_data, option=False)``.
+        """
+        Product = self.env['product.product'].sudo()
+        lines = [(item, False) for item in items]
+        lines += [(option, True) for item in items for option in item.get('options', [])]
+
+        linked = {
+            option: Product._get_ordable_linked_products(
+                brand.concept, [line.get('id') for line, is_option in lines if is_option == option], option=option)
+            for option in (False, True)
+        }
+        unlinked = [line for line, option in lines if linked[option].get(line.get('id')) is None]
+        names = list({line['name'] for line in unlinked})
+        pos = tax_ids is not None
+        if not names:
+            by_name = {}
+        elif pos:
+            by_name = Product._find_concept_products(brand.concept, names)
+        else:
+            by_name = {}
+            for record in Product.search_read([('name', 'in', names)], ['name'], order='id'):
+                by_name.setdefault(record['name'], record['id'])
+
+        to_create = {}
+        for line in unlinked:
+            if line['name'] not in by_name and line['name'] not in to_create:
+                vals = {
+                    'name': line['name'],
+                    'list_price': line.get('price', 0),
+                    'categ_id': 1,
+                }
+                if pos:
+                    vals.update({
+                        'concept_ids': [(6, 0, [brand.concept.id])],
+                        'taxes_id': [(6, 0, tax_ids)],
+                    })
+                to_create[line['name']] = vals
+        if to_create:
+            templates = self.env['product.template'].sudo().create(list(to_create.values()))
+            for name, template in zip(to_create, templates):
+                by_name[name] = template.product_variant_id.id
+            _logger.info(f"Created {len(templates)} new products: {', '.join(to_create)}")
+
+        def product_of(line_data, option=False):
+            product_id = linked[option].get(line_data.get('id')) or by_name[line_data['name']]
+            return Product.browse(product_id)
+        return product_of
+
+    @api.model
+    def _get_delivery_product(self, delivery_rate, tax_ids=None):
+        delivery_product = self.env['product.product'].sudo().browse(self._get_delivery_product_id()).exists()
+        if not delivery_product:
+            vals = {
+                'name': DELIVERY_PRODUCT_NAME,
+                'type': 'service',
+                'list_price': delivery_rate,
+                'categ_id': 1,
+            }
+            if tax_ids is not None:
+                vals['taxes_id'] = [(6, 0, tax_ids)]
+            delivery_product = self.env['product.template'].sudo().create(vals).product_variant_id
+            _logger.info(f"Created Delivery Charge product with ID: {delivery_product.id}")
+        return delivery_product
+
+    # ------------------------------------------------------------
+    # Cached references
+    # ------------------------------------------------------------
+    # Looked up by every order, cached per registry. The models they come
+    # from clear the caches when a relevant field changes (pos_session.py,
+    # account_tax.py, product_template.py, ordable_payment_method_map.py).
+
+    @api.model
+    @tools.ormcache()
+    def _get_call_center_session_id(self):
+        """Id of the open Call Center POS session, or False."""
+        return self.env['pos.session'].sudo().search([
+            ('state', '=', 'opened'),
+            ('config_id.name', '=', CALL_CENTER_CONFIG_NAME)
+        ], limit=1).id
+
+    @api.model
+    def _get_call_center_session(self):
+        session_id = self._get_call_center_session_id()
+        session = self.env['pos.session'].sudo().browse(session_id).exists()
+        if session_id and (not session or session.state != 'opened'
+                           or session.config_id.name != CALL_CENTER_CONFIG_NAME):
+            # Closed or renamed since it was cached, the signal not received yet
+            self.clear_caches()
+            session = self.env['pos.session'].sudo().browse(self._get_call_center_session_id())
+        return session
+
+    @api.model
+    @tools.ormcache('company_id')
+    def _get_zero_tax_ids(self, company_id):
+        """Ids of the company's 0% sales tax (mandatory for Kuwait), as a tuple."""
+        return tuple(self.env['account.tax'].sudo().search([
+            ('company_id', '=', company_id),
+            ('type_tax_use', '=', 'sale'),
+            ('amount', '=', 0.0)
+        ], limit=1).ids)
+
+    @api.model
+    @tools.ormcache()
+    def _get_delivery_product_id(self):
+        return self.env['product.product'].sudo().search([
+            ('name', '=', DELIVERY_PRODUCT_NAME),
+            ('type', '=', 'service')
+        ], limit=1).id
+
+    # ------------------------------------------------------------
+    # POS orders
+    # ------------------------------------------------------------
+
+    @api.model
+    def _create_pos_order(self, order_data, payments, partner, brand):
+        """
+        Create POS order in the Call Center POS
+        """
+        # 1. CHECK FOR DUPLICATE POS ORDER
+        claimed, existing_pos_order = self._claim_ordable_order('pos.order', order_data)
+        if not claimed:
+            _logger.info(f"POS Order {order_data.get('tracking_id')} is being imported by another worker, retrying later.")
+            return {'success': True, 'in_progress': True}
+        if existing_pos_order:
+            _logger.info(f"POS Order already exists with ordable_id: {order_data.get('id')} and ordable_tracking_id: {order_data.get('tracking_id')}. Skipping creation.")
+            return {'success': True, 'pos_order_id': existing_pos_order.id, 'already_exists': True}
+
+        # 2. SESSION, COMPANY, AND TAX ACQUISITION
+        pos_session = self._get_call_center_session()
+
+        if not pos_session:
+            _logger.error("No active POS session found for Call Center")
+            return {'success': False, 'error': 'No active POS session found for Call Center'}
+
+        company_id = pos_session.config_id.company_id.id
+
+        # Find the 0% Sales Tax Record (mandatory for Kuwait)
+        tax_ids_to_use = list(self._get_zero_tax_ids(company_id))
+
+        if not tax_ids_to_use:
+            _logger.warning(f"No 0% Sales Tax record found for company ID {company_id}")
+
+        # 3. ORDER LINES - Items, their options and the delivery charge,
+        # created along with the order so its amounts are computed once
+        line_commands = []
+        product_of = self._get_order_products(brand, order_data.get('items', []), tax_ids_to_use)
+        for item in order_data.get('items', []):
+            product = product_of(item)
+
+            unit_price = item.get('price', 0)
+            quantity = item.get('quantity', 1)
+            subtotal = unit_price * quantity
+
+            line_commands.append((0, 0, {
+                'product_id': product.id,
+                'qty': quantity,
+                'price_unit': unit_price,
+                'price_subtotal': subtotal,
+                'price_subtotal_incl': subtotal,
+                'tax_ids': [(6, 0, tax_ids_to_use)],
+                'full_product_name': product.display_name,
+            }))
+
+            # Separate lines for item options
+            for option in item.get('options', []):
+                option_product = product_of(option, option=True)
+
+                option_qty = option.get('quantity', 1)
+                option_price = option.get('price', 0)
+                option_subtotal = option_qty * option_price
+
+                line_commands.append((0, 0, {
+                    'product_id': option_product.id,
+                    'qty': option_qty,
+                    'price_unit': option_price,
+                    'price_subtotal': option_subtotal,
+                    'price_subtotal_incl': option_subtotal,
+                    'tax_ids': [(6, 0, tax_ids_to_use)],
+                    'full_product_name': f"{product.display_name} - {option['name']}",
+                }))
+
+        is_delivery = order_data.get('is_delivery', False)
+        delivery_rate = order_data.get('delivery_rate', 0.0)
+
+        if is_delivery and delivery_rate > 0:
+            delivery_product = self._get_delivery_product(delivery_rate, tax_ids_to_use)
+            line_commands.append((0, 0, {
+                'product_id': delivery_product.id,
+                'qty': 1,
+                'price_unit': delivery_rate,
+                'price_subtotal': delivery_rate,
+                'price_subtotal_incl': delivery_rate,
+                'tax_ids': [(6, 0, tax_ids_to_use)],
+                'full_product_name': 'Delivery Charge',
+            }))
+
+        # 4. POS ORDER CREATION
+        pos_order_vals = {
+            'partner_id': partner.id,
+            'session_id': pos_session.id,
+            'user_id': pos_session.user_id.id,
+            'company_id': company_id,
+            'pricelist_id': pos_session.config_id.pricelist_id.id,
+            'fiscal_position_id': partner.property_account_position_id.id or False,
+            'ordable_id': order_data.get('id'),
+            'ordable_tracking_id': order_data.get('tracking_id'),
+            'concept_id': brand.concept.id,
+            'amount_tax': 0.0,
+            'amount_total': order_data.get('total', 0.0),
+            'amount_paid': order_data.get('total', 0.0),
+            'amount_return': 0.0,
+            'lines': line_commands,
+        }
+
+        pos_order, already_exists = self._create_ordable_order('pos.order', pos_order_vals)
+        if already_exists:
+            return {'success': True, 'pos_order_id': pos_order.id, 'already_exists': True}
+        _logger.info(f"POS Order created with reference: {pos_order.pos_reference} and {len(line_commands)} lines")
+        if is_delivery and delivery_rate > 0:
+            _logger.info(f"Added delivery charge of {delivery_rate} to POS Order {pos_order.id}")
+
+        # 5. PAYMENT CREATION
+        for payment in payments:
+            payment_method_name = payment.get('payment_method')
+            payment_amount = payment.get('amount')
+
+            if not payment_method_name or payment_amount is None:
+                _logger.warning("Payment entry is missing method or amount. Skipping.")
+                continue
+
+            # Find POS payment method
+            payment_method = self.env['pos.payment.method'].sudo().browse(
+                self.env['ordable.payment.method.map']._resolve_payment_method(payment_method_name))
+
+            if not payment_method:
+                _logger.warning(f"Payment method '{payment_method_name}' not found. Skipping payment.")
+                continue
+
+            self.env['pos.payment'].sudo().create({
+                'amount': payment_amount,
+                'payment_method_id': payment_method.id,
+                'pos_order_id': pos_order.id,
+                'name': f"{payment_method_name} Ref: {payment.get('payment_reference', '')}",
+            })
+            _logger.info(f"Payment added to POS order with method: {payment_method_name}")
+
+        # 6. VALIDATE AND MARK ORDER AS PAID
+        pos_order.action_pos_order_paid()
+        _logger.info(f"POS Order validated and paid with ID: {pos_order.id}")
+        return {'success': True, 'pos_order_id': pos_order.id}
+
+    # ------------------------------------------------------------
+    # Sale orders
+    # ------------------------------------------------------------
+
+    @api.model
+    def _create_sale_order(self, order_data, partner, brand):
+        # Validate required data
+        if not order_data.get('items'):
+            return {'success': False, 'error': "Order must contain at least one item"}
+
+        # Check if sale order already exists with the same ordable_id and ordable_tracking_id
+        claimed, existing_order = self._claim_ordable_order('sale.order', order_data)
+        if not claimed:
+            _logger.info(f"Sale Order {order_data['tracking_id']} is being imported by another worker, retrying later.")
+            return {'success': True, 'in_progress': True}
+
+        if existing_order:
+            _logger.info(
+                f"Sale Order already exists with ordable_id: {order_data['id']} and ordable_tracking_id: {order_data['tracking_id']}. Skipping creation.")
+            return {'success': True, 'sale_order_id': existing_order.id, 'already_exists': True}
+
+        # Lines are created along with the order so its amounts are computed once
+        line_commands = []
+        product_of = self._get_order_products(brand, order_data.get('items', []))
+        for item in order_data.get('items', []):
+            product = product_of(item)
+            line_commands.append((0, 0, {
+                'product_id': product.id,
+                'product_uom_qty': item['quantity'],
+                'price_unit': item['price'],
+            }))
+
+            # Optionally, create a separate line for each option (if each adds to total)
+            for option in item.get('options', []):
+                option_product = product_of(option, option=True)
+                line_commands.append((0, 0, {
+                    'product_id': option_product.id,
+                    'product_uom_qty': option['quantity'],
+                    'price_unit': option['price'],
+                }))
+
+        # Add delivery charge if applicable
+        is_delivery = order_data.get('is_delivery', False)
+        delivery_rate = order_data.get('delivery_rate', 0.0)
+
+        if is_delivery and delivery_rate > 0:
+            delivery_product = self._get_delivery_product(delivery_rate)
+            line_commands.append((0, 0, {
+                'product_id': delivery_product.id,
+                'product_uom_qty': 1,
+                'price_unit': delivery_rate,
+            }))
+
+        # Prepare sale order values
+        sale_order_vals = {
+            'partner_id': partner.id,
+            'ordable_id': order_data['id'],
+            'ordable_tracking_id': order_data['tracking_id'],
+            'user_id': 1,
+            'company_id': brand.company_id.id,
+            'note': order_data.get('special_remarks', ''),
+            'client_order_ref': order_data.get('tracking_id'),
+            'order_line': line_commands,
+        }
+        if brand.ordable_defer_sale_processing:
+            sale_order_vals['ordable_processing_state'] = 'pending'
+
+        sale_order, already_exists = self._create_ordable_order('sale.order', sale_order_vals)
+        if already_exists:
+            return {'success': True, 'sale_order_id': sale_order.id, 'already_exists': True}
+        if is_delivery and delivery_rate > 0:
+            _logger.info(f"Added delivery charge of {delivery_rate} to Sale Order {sale_order.id}")
+
+        _logger.info(f"Sale Order created with ID: {sale_order.id}")
+        if brand.ordable_defer_sale_processing:
+            # Confirmed, invoiced and paid later by _cron_process_sale_orders
+            self._trigger_sale_order_processing(
+                fields.Datetime.now() + timedelta(seconds=SALE_PROCESSING_DELAY_SECONDS))
+            return {'success': True, 'sale_order_id': sale_order.id, 'deferred': True}
+        sale_order.action_confirm()
+        _logger.info("Sale Order Confirmed with ID: %s", sale_order.id)
+        return {'success': True, 'sale_order_id': sale_order.id}
+
+    @api.model
+    def _sale_order_invoice_payment(self, sale_order):
+        """
+        Create, post and pay the invoice of a sale order whose payment is complete
+        """
+        invoice = sale_order._create_invoices()
+        _logger.info(f"Invoice created with ID: {invoice.id} for Sale Order: {sale_order.id}")
+        invoice.action_post()
+        payment = self._register_invoice_payments(invoice)
+        return {'success': True, 'invoice_id': invoice.id, 'payment_id': payment.id or None}
+
+    @api.model
+    def _register_invoice_payments(self, invoices):
+        """Register and post a payment of the full amount of each invoice, all in one batch."""
+        journals = {}
+        payment_vals = []
+        for invoice in invoices:
+            company = invoice.company_id
+            if company not in journals:
+                # Get default payment method (cash/bank journal)
+                journals[company] = self.env['account.journal'].sudo().search([
+                    ('type', 'in', ['cash', 'bank']),
+                    ('company_id', '=', company.id)
+                ], limit=1)
+            if not journals[company]:
+                _logger.warning(f"No payment journal found for company: {company.name}")
+                continue
+            payment_vals.append({
+                'payment_type': 'inbound',
+                'partner_type': 'customer',
+                'partner_id': invoice.partner_id.id,
+                'amount': invoice.amount_total,
+                'journal_id': journals[company].id,
+                'date': datetime.now().date(),
+                'ref': f"Payment for {invoice.name}",
+                'currency_id': invoice.currency_id.id,
+            })
+        payments = self.env['account.payment'].sudo().create(payment_vals)
+        payments.action_post()
+        for payment in payments:
+            _logger.info(f"Payment {payment.id} registered: {payment.ref}")
+        return payments
+
+    @api.model
+    def _create_sale_order_payment(self, sale_order, payments):
+        """Invoice the sale order and register the payments of a payment webhook."""
+        _logger.info(f"Processing payment for Sale Order ID: {sale_order.id}")
+
+        # A repeated payment webhook must not pay the order twice
+        invoices = sale_order.invoice_ids.filtered(lambda move: move.state == 'posted')
+        if invoices and all(move.payment_state in ('paid', 'in_payment') for move in invoices):
+            _logger.info(f"Sale Order {sale_order.id} is already paid. Skipping payments.")
+            return {'success': True, 'sale_order_id': sale_order.id, 'already_paid': True}
+
+        # Check if sale order is confirmed, if not confirm it
+        if sale_order.state in ['draft', 'sent']:
+            sale_order.action_confirm()
+            _logger.info(f"Sale Order {sale_order.id} confirmed successfully")
+
+        # Check if invoice exists, if not create it
+        if not sale_order.invoice_ids:
+            invoice = sale_order._create_invoices()
+            invoice.action_post()
+            _logger.info(f"Invoice {invoice.id} created and posted for Sale Order {sale_order.id}")
+
+        # Process each payment from the payment_data
+        for payment in payments:
+            payment_method = payment.get('payment_method')
+            payment_amount = payment.get('amount')
+            payment_reference = payment.get('payment_reference', '')
+            payment_payid = payment.get('payment_payid', '')
+
+            if not payment.get('payment_complete', False):
+                _logger.warning(f"Payment not complete for tracking_id: {payment.get('tracking_id')}. Skipping payment creation.")
+                continue
+
+            if not payment_method or payment_amount is None:
+                _logger.warning("Payment entry is missing method or amount. Skipping.")
+                continue
+
+            # Find the appropriate payment journal based on payment method
+            journal = self.env['account.journal'].sudo().search([
+                ('type', 'in', ['bank', 'cash', 'myfatoorah']),
+                ('company_id', '=', sale_order.company_id.id)
+            ], limit=1)
+
+            if not journal:
+                _logger.warning(f"No suitable journal found for payment method '{payment_method}'")
+                continue
+
+            payment_record = self.env['account.payment'].sudo().create({
+                'payment_type': 'inbound',
+                'partner_type': 'customer',
+                'partner_id': sale_order.partner_id.id,
+                'amount': payment_amount,
+                'journal_id': journal.id,
+                'ref': f"{payment_method} - Ref: {payment_reference} - PayID: {payment_payid}",
+                'currency_id': sale_order.currency_id.id,
+                'date': datetime.now(),
+            })
+            payment_record.action_post()
+            _logger.info(f"Payment created successfully for Sale Order {sale_order.id} with amount {payment_amount}")
+
+            # Reconcile the payment with the invoice if invoice exists
+            if sale_order.invoice_ids:
+                invoice = sale_order.invoice_ids[0]
+                lines_to_reconcile = payment_record.line_ids.filtered(lambda l: l.account_id == invoice.line_ids[0].account_id)
+                invoice_lines = invoice.line_ids.filtered(lambda l: l.account_id == lines_to_reconcile[0].account_id)
+                (lines_to_reconcile + invoice_lines).reconcile()
+                _logger.info(f"Payment reconciled with invoice for Sale Order {sale_order.id}")
+
+        return {'success': True, 'sale_order_id': sale_order.id}
+
+    # ------------------------------------------------------------
+    # Deferred sale order processing
+    # ------------------------------------------------------------
+    # Brands with ordable_defer_sale_processing only create draft sale
+    # orders while importing; confirmation, invoicing and payments run from
+    # a cron, by batches.
+
+    @api.model
+    def _trigger_sale_order_processing(self, at=None):
+        cron = self.env.ref('ordable_connector.ir_cron_ordable_sale_order_processing', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger(at)
+
+    @api.model
+    def _defer_sale_order_payments(self, sale_order, payments):
+        """
+        Queue the payments of a payment webhook on a sale order still waiting
+        to be processed. Returns False when the order was processed already,
+        the payments then being applied right away.
+        """
+        # Wait for a run processing this very order to commit
+        self.env.cr.execute(
+            "SELECT ordable_processing_state FROM sale_order WHERE id = %s FOR UPDATE", [sale_order.id])
+        if self.env.cr.fetchone()[0] != 'pending':
+            return False
+        sale_order.invalidate_recordset(['ordable_pending_payments'])
+        pending = json.loads(sale_order.ordable_pending_payments or '[]')
+        sale_order.ordable_pending_payments = json.dumps(pending + list(payments))
+        self._trigger_sale_order_processing()
+        _logger.info(f"Payments of Sale Order {sale_order.id} queued until it is processed")
+        return True
+
+    @api.model
+    def _cron_process_sale_orders(self, limit=SALE_PROCESSING_BATCH_SIZE, auto_commit=False):
+        # SKIP LOCKED: orders being paid by a webhook are left for the next run
+        self.env.cr.execute("""
+            SELECT id FROM sale_order
+             WHERE ordable_processing_state = 'pending'
+          ORDER BY id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, [limit])
+        orders = self.env['sale.order'].sudo().browse([row[0] for row in self.env.cr.fetchall()])
+        if orders:
+            self._process_sale_orders(orders)
+            if auto_commit:
+                self.env.cr.commit()
+
+        # A full batch means there is probably more waiting
+        if len(orders) == limit:
+            self._trigger_sale_order_processing()
+        return len(orders)
+
+    @api.model
+    def _process_sale_orders(self, orders):
+        """
+        Process the orders as one batch. When the batch fails it is rolled
+        back and the orders are processed one by one instead, so an order
+        that cannot be confirmed or invoiced only fails itself.
+        """
+        try:
+            with self.env.cr.savepoint():
+                self._process_sale_order_batch(orders)
+        except Exception:
+            _logger.exception(f"[ORDABLE] Batch of {len(orders)} sale orders failed, processing them one by one")
+            self.env.invalidate_all()
+        else:
+            orders.write({'ordable_processing_state': 'done', 'ordable_processing_error': False})
+            _logger.info(f"[ORDABLE] {len(orders)} deferred sale orders processed")
+            return
+
+        for order in orders:
+            try:
+                with self.env.cr.savepoint():
+                    self._process_sale_order_batch(order)
+            except Exception as e:
+                _logger.exception(f"[ORDABLE] Deferred processing of Sale Order {order.id} failed")
+                self.env.invalidate_all()
+                order.write({'ordable_processing_state': 'failed', 'ordable_processing_error': str(e)})
+            else:
+                order.write({'ordable_processing_state': 'done', 'ordable_processing_error': False})
+
+    @api.model
+    def _process_sale_order_batch(self, orders):
+        """Confirm, invoice, post and pay the orders with one call per step where Odoo allows it."""
+        orders.filtered(lambda order: order.state in ('draft', 'sent')).action_confirm()
+
+        # One invoice per order, even for orders of the same customer
+        to_invoice = orders.filtered(
+            lambda order: (order.ordable_pay_on_process or order.ordable_pending_payments) and not order.invoice_ids)
+        if to_invoice:
+            to_invoice._create_invoices(grouped=True).action_post()
+
+        to_pay = orders.filtered('ordable_pay_on_process').invoice_ids.filtered(
+            lambda move: move.state == 'posted' and move.payment_state == 'not_paid')
+        if to_pay:
+            self._register_invoice_payments(to_pay)
+
+        for order in orders.filtered('ordable_pending_payments'):
+            self._create_sale_order_payment(order, json.loads(order.ordable_pending_payments))
+            order.ordable_pending_payments = False
@@ -0,0 +1,324 @@
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from odoo import api, models, fields, SUPERUSER_ID, _
+
+_logger = logging.getLogger(__name__)
+
+# Retry schedule: 30s, 1m, 2m, 4m ... capped at one hour between attempts
+OUTBOX_RETRY_BASE_SECONDS = 30
+OUTBOX_RETRY_MAX_SECONDS = 3600
+OUTBOX_MAX_ATTEMPTS = 10
+OUTBOX_BATCH_SIZE = 100
+# A row being sent is claimed this long; past it a dead worker's row is sent again
+OUTBOX_LEASE_SECONDS = 300
+
+# In-process delivery right after commit; the cron only picks up what a
+# dead or recycled worker left behind, DISPATCH_GRACE_SECONDS later.
+DISPATCH_WORKERS = 4
+DISPATCH_GRACE_SECONDS = 60
+DISPATCH_SLACK_SECONDS = 0.5
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=DISPATCH_WORKERS, thread_name_prefix='ordable_outbox')
+    return _executor
+
+
+def _deliver_in_background(registry, uid, row_ids, model_name='ordable.outbox'):
+    thread = threading.current_thread()
+    thread.dbname = registry.db_name
+    thread.uid = uid
+    try:
+        with registry.cursor() as cr:
+            env = api.Environment(cr, uid, {})
+            env[model_name].browse(row_ids)._process_due(auto_commit=True)
+    except Exception:
+        _logger.exception(f"[ORDABLE] Background processing of {model_name} rows {row_ids} failed, the cron will retry")
+
+
+class OrdableOutbox(models.Model):
+    """
+    Durable queue of calls to Ordable.
+
+    Rows are written in the same transaction as the business change that
+    produced them, so nothing is sent for a rolled back order and nothing
+    is lost when Ordable is slow or down. Rows are delivered by a background
+    thread after commit; the drainer cron retries failures and picks up rows
+    left behind by a dead worker.
+    """
+    _name = "ordable.outbox"
+    _description = "Ordable Outbox"
+    _order = "next_attempt_at, id"
+
+    kind = fields.Selection([
+        ('order', 'Order Push'),
+        ('status', 'Status Update'),
+    ], string="Kind", required=True, default='order')
+    pos_order_id = fields.Many2one("pos.order", string="POS Order", ondelete="cascade", index=True)
+    brand_id = fields.Many2one("ordable.brand", string="Brand", required=True, ondelete="cascade")
+    endpoint = fields.Char(string="Endpoint", required=True)
+    method = fields.Char(string="Method", required=True, default="POST")
+    payload = fields.Text(string="Payload", required=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Accepted'),
+        ('done', 'Sent'),
+        ('failed', 'Failed'),
+    ], string="State", required=True, default='pending', index=True)
+    attempts = fields.Integer(string="Attempts", default=0)
+    next_attempt_at = fields.Datetime(string="Next Attempt", default=fields.Datetime.now, index=True)
+    last_attempt_at = fields.Datetime(string="Last Attempt")
+    last_error = fields.Text(string="Last Error")
+    response = fields.Text(string="Response")
+
+    @api.model
+    def _enqueue(self, kind, brand, endpoint, payload, method="POST", at=None, **extra_vals):
+        """Store a call for delivery at ``at`` (default: now) and wake up the drainer then."""
+        vals = {
+            'kind': kind,
+            'brand_id': brand.id,
+            'endpoint': endpoint,
+            'method': method,
+            'payload': json.dumps(payload),
+            'next_attempt_at': at or fields.Datetime.now(),
+        }
+        vals.update(extra_vals)
+        row = self.sudo().create(vals)
+        row._dispatch_after_commit(at)
+        return row
+
+    def _dispatch_after_commit(self, at=None):
+        """
+        Deliver the rows from a background thread once the current transaction
+        has committed (and not before ``at``), so the request that queued them
+        never waits on Ordable. The drainer cron is scheduled a grace period
+        later as a durable fallback in case this process dies first.
+        """
+        now = fields.Datetime.now()
+        at = at or now
+        self._trigger_drainer(at + timedelta(seconds=DISPATCH_GRACE_SECONDS))
+
+        registry = self.env.registry
+        row_ids = self.ids
+        delay = max((at - now).total_seconds(), 0)
+
+        # As superuser like the cron: the user who queued the rows (a cashier)
+        # usually cannot write them, nor the order fields set on delivery
+        def submit():
+            _get_executor().submit(_deliver_in_background, registry, SUPERUSER_ID, row_ids)
+
+        @self.env.cr.postcommit.add
+        def schedule():
+            if delay:
+                timer = threading.Timer(delay + DISPATCH_SLACK_SECONDS, submit)
+                timer.daemon = True
+                timer.start()
+            else:
+                submit()
+
+    @api.model
+    def _trigger_drainer(self, at=None):
+        cron = self.env.ref('ordable_connector.ir_cron_ordable_outbox', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger(at)
+
+    @api.model
+    def _cron_process_outbox(self, limit=OUTBOX_BATCH_SIZE, auto_commit=False):
+        # Rows left 'sending' past their lease belonged to a worker that died,
+        # rows left 'sent' could not be recorded on their order yet
+        rows = self.search([
+            ('state', 'in', ('pending', 'sending', 'sent')),
+            ('next_attempt_at', '<=', fields.Datetime.now()),
+        ], limit=limit)
+        rows._process_due(auto_commit=auto_commit)
+
+        # A full batch means there is probably more waiting
+        if len(rows) == limit:
+            self._trigger_drainer()
+        return len(rows)
+
+    def _process_due(self, auto_commit=False):
+        """
+        Deliver the rows that are still due. Each row is claimed first (state
+        'sending' with a lease) and, with ``auto_commit``, the claim is
+        committed before calling Ordable: no lock is held during the call, so
+        status coalescing never waits on it, and the outcome is recorded in a
+        transaction started after the call. Rows Ordable already accepted
+        are only recorded again, never sent again.
+        """
+        for row in self:
+            if not row._claim():
+                continue
+            if row.state == 'sent':
+                row._finish_delivery()
+            else:
+                if auto_commit:
+                    self.env.cr.commit()
+                row._process(auto_commit=auto_commit)
+            if auto_commit:
+                self.env.cr.commit()
+
+    def _claim(self):
+        """
+        Mark the row as being sent, unless another worker has it. Returns
+        whether it was claimed. An accepted row is only locked: it is not to
+        be sent again.
+        """
+        self.ensure_one()
+        now = fields.Datetime.now()
+        self.env.cr.execute("""
+            SELECT state FROM ordable_outbox
+             WHERE id = %s AND state IN ('pending', 'sending', 'sent') AND next_attempt_at <= %s
+               FOR UPDATE SKIP LOCKED
+        """, [self.id, now])
+        row = self.env.cr.fetchone()
+        if not row:
+            return False
+        self.invalidate_recordset()
+        if row[0] == 'sent':
+            return True
+        self.write({'state': 'sending', 'next_attempt_at': now + timedelta(seconds=OUTBOX_LEASE_SECONDS)})
+        return True
+
+    @api.model
+    def _get_queued_order_ids(self):
+        """Ids of the POS orders whose push is still queued, being sent or not recorded yet."""
+        rows = self.sudo().search_read([
+            ('kind', '=', 'order'),
+            ('state', 'in', ('pending', 'sending', 'sent')),
+        ], ['pos_order_id'], load=None)
+        return {row['pos_order_id'] for row in rows if row['pos_order_id']}
+
+    def _lock_pending(self):
+        """The rows still pending that no worker is claiming, locked until the end of the transaction."""
+        if not self:
+            return self
+        self.env.cr.execute("""
+            SELECT id FROM ordable_outbox
+             WHERE id IN %s AND state = 'pending'
+               FOR UPDATE SKIP LOCKED
+        """, [tuple(self.ids)])
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def action_retry(self):
+        # A row being sent or already accepted finishes on its own
+        rows = self.filtered(lambda row: row.state not in ('sending', 'sent'))
+        rows.write({'state': 'pending', 'next_attempt_at': fields.Datetime.now()})
+        rows._dispatch_after_commit()
+
+    def _process(self, auto_commit=False):
+        self.ensure_one()
+        try:
+            result = self._deliver()
+        except Exception as e:
+            _logger.exception(f"[ORDABLE] Outbox row {self.id} crashed while delivering")
+            result = {"error": str(e)}
+
+        if auto_commit:
+            # The call only read: end its snapshot, taken before the call, so the
+            # order changes made meanwhile are seen and not conflicted with
+            self.env.cr.commit()
+            self.env.invalidate_all()
+
+        if result.get("retry_after"):
+            self._defer(result["retry_after"], result.get("error"))
+        elif result.get("error"):
+            self._schedule_retry(result["error"])
+        else:
+            # Saved first and on its own: whatever happens when recording it on
+            # the order, the row is never claimed and sent again
+            now = fields.Datetime.now()
+            self.write({
+                'state': 'sent',
+                'attempts': self.attempts + 1,
+                'last_attempt_at': now,
+                'next_attempt_at': now + timedelta(seconds=OUTBOX_RETRY_BASE_SECONDS),
+                'last_error': False,
+                'response': json.dumps(result, default=str),
+            })
+            if auto_commit:
+                self.env.cr.commit()
+            self._finish_delivery()
+
+    def _finish_delivery(self):
+        """
+        Record on the order what Ordable accepted, and close the row. On
+        failure (e.g. a concurrent update of the order) the row stays
+        'sent' and the drainer records it again later, without calling
+        Ordable.
+        """
+        self.ensure_one()
+        try:
+            with self.env.cr.savepoint():
+                self._record_delivery(json.loads(self.response or '{}'))
+                self.write({'state': 'done'})
+        except Exception as e:
+            self.env.invalidate_all()
+            _logger.exception(f"[ORDABLE] Outbox row {self.id} was accepted by Ordable but could not be recorded")
+            at = fields.Datetime.now() + timedelta(seconds=OUTBOX_RETRY_BASE_SECONDS)
+            self.write({'next_attempt_at': at, 'last_error': str(e)})
+            self._trigger_drainer(at)
+
+    def _deliver(self):
+        """Send the stored call, writing nothing. Returns a dict with an 'error' key on failure."""
+        payload = json.loads(self.payload)
+        if self.kind == 'order':
+            order = self.pos_order_id
+            if order.ordable_id or order.ordable_payload_hash:
+                # Pushed meanwhile (manual push, bulk sync, earlier attempt):
+                # a second POST would create a second order on Ordable
+                _logger.info(f"[ORDABLE] Outbox row {self.id}: order {order.id} already on Ordable, not sent again")
+                return {"already_synced": True}
+            return order._post_order_to_ordable(payload, self.brand_id)
+        if self.kind == 'status':
+            return self.pos_order_id._patch_ordable_status(payload['status'], self.brand_id)
+        return {"error": _("Unknown outbox kind %s") % self.kind}
+
+    def _record_delivery(self, result):
+        """Store on the order what Ordable acknowledged."""
+        payload = json.loads(self.payload)
+        if result.get("already_synced"):
+            return
+        if self.kind == 'order':
+            self.pos_order_id._record_ordable_push(payload, result)
+        elif self.kind == 'status':
+            self.pos_order_id._record_ordable_status(payload['status'])
+
+    def _defer(self, seconds, reason):
+        """
+        Postpone a row that Ordable could not take right now (open circuit,
+        429/503 with Retry-After) without using up an attempt.
+        """
+        at = fields.Datetime.now() + timedelta(seconds=seconds)
+        self.write({'state': 'pending', 'next_attempt_at': at, 'last_error': reason})
+        self._trigger_drainer(at)
+
+    def _schedule_retry(self, error):
+        attempts = self.attempts + 1
+        now = fields.Datetime.now()
+        vals = {
+            'state': 'pending',
+            'attempts': attempts,
+            'last_attempt_at': now,
+            'last_error': error,
+        }
+        if attempts >= OUTBOX_MAX_ATTEMPTS:
+            vals['state'] = 'failed'
+            _logger.error(f"[ORDABLE] Outbox row {self.id} gave up after {attempts} attempts: {error}")
+        else:
+            delay = min(OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), OUTBOX_RETRY_MAX_SECONDS)
+            vals['next_attempt_at'] = now + timedelta(seconds=delay)
+            _logger.warning(f"[ORDABLE] Outbox row {self.id} failed (attempt {attempts}), retrying in {delay}s: {error}")
+        self.write(vals)
@@ -0,0 +1,76 @@
+from odoo import api, fields, models, tools
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class OrdablePaymentMethodMap(models.Model):
+    _name = 'ordable.payment.method.map'
+    _description = 'Ordable Payment Method Mapping'
+    _order = 'sequence, id'
+
+    name = fields.Char(
+        string='Ordable Payment Method',
+        required=True,
+        help="Payment method name as sent by Ordable (case insensitive)"
+    )
+    payment_method_id = fields.Many2one(
+        'pos.payment.method',
+        string='POS Payment Method',
+        required=True,
+        ondelete='cascade',
+    )
+    sequence = fields.Integer(string='Sequence', default=10)
+    active = fields.Boolean(string='Active', default=True)
+
+    _sql_constraints = [
+        ('name_uniq', 'unique(name)',
+         'Each Ordable payment method can only have one mapping!'),
+    ]
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.clear_caches()
+        return records
+
+    def write(self, vals):
+        result = super().write(vals)
+        self.clear_caches()
+        return result
+
+    def unlink(self):
+        result = super().unlink()
+        self.clear_caches()
+        return result
+
+    @api.model
+    @tools.ormcache()
+    def _get_payment_method_map(self):
+        """
+        Return {lowercase ordable name: pos.payment.method id} for all active
+        mappings. Cached per registry and cleared whenever a mapping changes.
+        """
+        mappings = self.sudo().search_read([], ['name', 'payment_method_id'], load=None)
+        return tools.frozendict({
+            mapping['name'].strip().lower(): mapping['payment_method_id']
+            for mapping in mappings
+        })
+
+    @api.model
+    @tools.ormcache('name')
+    def _resolve_payment_method(self, name):
+        """
+        POS payment method id for an Ordable payment method name, or False.
+
+        Unmapped names fall back to the first POS payment method whose name
+        contains them, as before the mapping existed; the answer is cached
+        too, so the scan runs once per name and worker.
+        """
+        method_id = self._get_payment_method_map().get(name.strip().lower())
+        if method_id:
+            return method_id
+        method = self.env['pos.payment.method'].sudo().search([('name', 'ilike', name)], limit=1)
+        if method:
+            _logger.info(f"[ORDABLE] Payment method '{name}' has no mapping, matched '{method.name}' by name")
+        return method.id
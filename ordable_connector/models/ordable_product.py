@@ -1,55 +1,59 @@
 import logging
-import requests
 from odoo import api, models, fields, _
 
 _logger = logging.getLogger(__name__)
 
 class OrdableProduct(models.Model):
     _name = "ordable.product"
+    _inherit = "ordable.catalogue.mixin"
+    _description = "Ordable Product"
 
-    name = fields.Char(string="Name")
-    concept = fields.Many2one("res.concept", string="Concept")
-    ordable_id = fields.Integer(string="ordable_id")
+    _ordable_endpoint = 'products/'
+    _ordable_etag_field = 'ordable_products_etag'
+    _ordable_modified_field = 'ordable_products_modified'
+
+    # Fields of the catalogue index (ordable.catalogue.index)
+    _ordable_index_fields = {'name', 'concept', 'ordable_id', 'active'}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['ordable.catalogue.index']._notify_change('ordable.product', records.concept.ids)
+        return records
+
+    def write(self, vals):
+        if not self._ordable_index_fields & set(vals):
+            return super().write(vals)
+        concepts = self.concept
+        result = super().write(vals)
+        self.env['ordable.catalogue.index']._notify_change('ordable.product', (concepts | self.concept).ids)
+        return result
+
+    def unlink(self):
+        self.env['ordable.catalogue.index']._notify_change('ordable.product', self.concept.ids)
+        return super().unlink()
 
     @api.model
     def sync_products_from_ordable(self):
         brands = self.env["ordable.brand"].search([("sync_ordable_info", "=", True)])
+        # One worker per concept when ordable.sync_concurrency > 1
+        return self.env['ordable.api']._run_partitioned(
+            'ordable.product', '_sync_brands_products', 'ordable.brand', brands._partition_by_concept())
 
+    @api.model
+    def _sync_brands_products(self, brands):
         for brand in brands:
-            try:
-                _logger.info(f"🔄 Syncing products for brand: {brand.name}")
-                headers = {
-                    "Authorization": brand.ordable_api_token,
-                    "Content-Type": "application/json"
-                }
-                url = f"{brand.ordable_base_url.rstrip('/')}/products/"
-                response = requests.get(url, headers=headers, timeout=60)
-                if response.status_code != 200:
-                    _logger.warning(f"Failed for {brand.name} - Status {response.status_code}")
-                    continue
-                data = response.json()
-                if not data.get("success"):
-                    _logger.warning(f"Invalid response for {brand.name}: {data}")
-                    continue
-                products = data.get("data", [])
-                for prod in products:
-                    ordable_id = prod.get("id")
-                    name = prod.get("name")
-                    existing = self.search([
-                        ("concept", "=", brand.concept.id),
-                        ("ordable_id", "=", ordable_id)
-                    ], limit=1)
-                    vals = {
-                        "name": name,
-                        "concept": brand.concept.id,
-                        "ordable_id": ordable_id,
-                    }
-
-                    if existing:
-                        existing.write(vals)
-                        _logger.info(f"✅ Updated product {name} ({ordable_id}) for {brand.name}")
-                    else:
-                        self.create(vals)
-                        _logger.info(f"🆕 Created product {name} ({ordable_id}) for {brand.name}")
-            except Exception as e:
-                _logger.error(f"❌ Error syncing brand {brand.name}: {str(e)}")
\ No newline at end of file
+            self._sync_brand_products(brand)
+
+    @api.model
+    def _sync_brand_products(self, brand):
+        try:
+            _logger.info(f"🔄 Syncing products for brand: {brand.name}")
+            counts = self._sync_brand_from_ordable(brand)
+            if counts:
+                _logger.info(
+                    f"✅ Synced products for {brand.name}: {counts['created']} created, "
+                    f"{counts['updated']} updated, {counts['archived']} archived, {counts['unchanged']} unchanged")
+            return counts
+        except Exception as e:
+            _logger.error(f"❌ Error syncing brand {brand.name}: {str(e)}")
@@ -1,12 +1,76 @@
 import logging
-import requests
 from odoo import api, models, fields, _
 
 _logger = logging.getLogger(__name__)
 
 class OrdableProductOption(models.Model):
     _name = "ordable.product.option"
+    _inherit = "ordable.catalogue.mixin"
+    _description = "Ordable Product Option"
 
-    name = fields.Char(string="Name")
-    concept = fields.Many2one("res.concept", string="Concept")
-    ordable_id = fields.Integer(string="ordable_id")
\ No newline at end of file
+    _ordable_endpoint = 'options/'
+    _ordable_etag_field = 'ordable_options_etag'
+    _ordable_modified_field = 'ordable_options_modified'
+    _ordable_sync_fields = ["name", "product_id", "parent_ordable_id", "ordable_product_id"]
+
+    # Ordable id of the parent product as sent by Ordable, kept even when the
+    # product itself has not been synced yet
+    parent_ordable_id = fields.Integer(string="Parent ordable_id")
+    ordable_product_id = fields.Many2one("ordable.product", string="Product", ondelete="set null")
+
+    @api.model
+    def sync_options_from_ordable(self):
+        brands = self.env["ordable.brand"].search([("sync_ordable_info", "=", True)])
+        # One worker per concept when ordable.sync_concurrency > 1
+        return self.env['ordable.api']._run_partitioned(
+            'ordable.product.option', '_sync_brands_options', 'ordable.brand', brands._partition_by_concept())
+
+    @api.model
+    def _sync_brands_options(self, brands):
+        for brand in brands:
+            self._sync_brand_options(brand)
+
+    @api.model
+    def _sync_brand_options(self, brand):
+        try:
+            _logger.info(f"🔄 Syncing options for brand: {brand.name}")
+            counts = self._sync_brand_from_ordable(brand)
+            if counts:
+                _logger.info(
+                    f"✅ Synced options for {brand.name}: {counts['created']} created, "
+                    f"{counts['updated']} updated, {counts['archived']} archived, {counts['unchanged']} unchanged")
+            return counts
+        except Exception as e:
+            _logger.error(f"❌ Error syncing options of brand {brand.name}: {str(e)}")
+
+    @api.model
+    def _prepare_ordable_page(self, concept, items):
+        page_data = super()._prepare_ordable_page(concept, items)
+        parent_ids = {self._get_parent_ordable_id(item) for item in items} - {None}
+        products = self.env['ordable.product'].search_read([
+            ('concept', '=', concept.id),
+            ('ordable_id', 'in', list(parent_ids)),
+        ], ['ordable_id'], order='id')
+        product_ids = {}
+        for product in products:
+            product_ids.setdefault(product['ordable_id'], product['id'])
+        page_data['product_ids'] = product_ids
+        return page_data
+
+    @api.model
+    def _prepare_ordable_vals(self, item, page_data):
+        vals = super()._prepare_ordable_vals(item, page_data)
+        parent_ordable_id = self._get_parent_ordable_id(item)
+        vals.update({
+            "parent_ordable_id": parent_ordable_id or 0,
+            "ordable_product_id": page_data['product_ids'].get(parent_ordable_id, False),
+        })
+        return vals
+
+    @api.model
+    def _get_parent_ordable_id(self, item):
+        """Ordable sends the parent either as an id or as a nested product object."""
+        parent = item.get("product_id", item.get("product"))
+        if isinstance(parent, dict):
+            parent = parent.get("id")
+        return parent or None
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import logging
+from odoo import api, models, fields, _
+
+_logger = logging.getLogger(__name__)
+
+class OrdablePushMixin(models.AbstractModel):
+    """
+    Push Odoo catalogue records to the Ordable brands of their concepts.
+
+    Each record is serialized per brand and hashed; only records whose hash
+    differs from the last accepted push are sent (POST when new, PUT when
+    changed), and records that left the brand's concept or were archived are
+    deleted. The id returned by Ordable is kept on ordable.push.record.
+    """
+    _name = "ordable.push.mixin"
+    _description = "Ordable Catalogue Push Mixin"
+
+    # Ordable endpoint of the records, e.g. 'categories'
+    _ordable_push_endpoint = None
+
+    def _get_ordable_push_payload(self, brand, push_records):
+        """Payload of one record for the brand. ``push_records`` maps related records to their push record."""
+        self.ensure_one()
+        return {"name": self.display_name}
+
+    def _prepare_ordable_push(self, brand):
+        """Related push records needed by _get_ordable_push_payload for all of self, loaded once."""
+        return {}
+
+    def _is_ordable_pushable(self, brand):
+        self.ensure_one()
+        return brand.concept in self.concept_ids and self.active
+
+    def _push_catalogue_to_ordable(self):
+        """Push self to every syncing brand of their concepts. Returns the counts per action."""
+        counts = {'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0, 'failed': 0}
+        records = self.with_context(active_test=False)
+        brands = self.env['ordable.brand'].sudo().search([
+            ('sync_ordable_info', '=', True),
+            ('ordable_api_token', '!=', False),
+        ])
+        for brand in brands:
+            push_records = self.env['ordable.push.record']._get_push_records(self._name, records.ids, brand)
+            # Nothing to do for records outside the concept that were never pushed there
+            todo = records.filtered(lambda r: r.id in push_records or brand.concept in r.concept_ids)
+            if not todo:
+                continue
+            related = todo._prepare_ordable_push(brand)
+            for record in todo:
+                result = record._push_record_to_ordable(brand, push_records.get(record.id), related)
+                counts[result] += 1
+        _logger.info(
+            f"[ORDABLE] {self._name} push: {counts['created']} created, {counts['updated']} updated, "
+            f"{counts['deleted']} deleted, {counts['unchanged']} unchanged, {counts['failed']} failed")
+        return counts
+
+    def _push_record_to_ordable(self, brand, push_record, related):
+        self.ensure_one()
+        Api = self.env['ordable.api']
+        endpoint = self._ordable_push_endpoint
+
+        if not self._is_ordable_pushable(brand):
+            if not push_record:
+                return 'unchanged'
+            if not push_record.ordable_id:
+                # Accepted without an id: there is nothing to address the DELETE to
+                _logger.warning(
+                    f"[ORDABLE] {self._name} {self.id} has no Ordable id for brand {brand.name}, "
+                    f"it must be removed from Ordable by hand")
+                push_record.unlink()
+                return 'failed'
+            result = Api._push_to_ordable(
+                json.dumps({"name": self.display_name}), f"{endpoint}/{push_record.ordable_id}", "DELETE", brand)
+            # Already gone on Ordable's side counts as deleted
+            if result.get("error") and result["error"] != "HTTP 404":
+                return 'failed'
+            push_record.unlink()
+            return 'deleted'
+
+        payload = self._get_ordable_push_payload(brand, related)
+        payload_hash = hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+        if push_record and push_record.payload_hash == payload_hash:
+            return 'unchanged'
+
+        if push_record and not push_record.ordable_id:
+            # A second POST would create a duplicate, and a PUT needs the id
+            _logger.warning(
+                f"[ORDABLE] {self._name} {self.id} has no Ordable id for brand {brand.name}, cannot update it")
+            return 'failed'
+        if push_record:
+            result = Api._push_to_ordable(json.dumps(payload), f"{endpoint}/{push_record.ordable_id}", "PUT", brand)
+        else:
+            result = Api._push_to_ordable(json.dumps(payload), endpoint, "POST", brand)
+        if result.get("error"):
+            return 'failed'
+
+        vals = {
+            'payload_hash': payload_hash,
+            'last_push_at': fields.Datetime.now(),
+        }
+        if result.get("id"):
+            vals['ordable_id'] = result["id"]
+        if push_record:
+            push_record.write(vals)
+            return 'updated'
+        vals.update(res_model=self._name, res_id=self.id, brand_id=brand.id)
+        self.env['ordable.push.record'].sudo().create(vals)
+        return 'created'
+
+    def _get_ordable_push_notification(self, counts):
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _("Ordable"),
+                'message': _("%(created)s created, %(updated)s updated, %(deleted)s deleted, "
+                             "%(unchanged)s unchanged, %(failed)s failed") % counts,
+                'type': 'warning' if counts['failed'] else 'success',
+                'sticky': bool(counts['failed']),
+            },
+        }
@@ -0,0 +1,35 @@
+import logging
+from odoo import api, models, fields, _
+
+_logger = logging.getLogger(__name__)
+
+class OrdablePushRecord(models.Model):
+    """
+    Last accepted push of an Odoo catalogue record (category, product) to one
+    brand: the id Ordable gave it and the hash of the payload it accepted.
+    """
+    _name = "ordable.push.record"
+    _description = "Ordable Catalogue Push"
+    _order = "res_model, res_id"
+
+    res_model = fields.Char(string="Model", required=True, index=True)
+    res_id = fields.Integer(string="Record ID", required=True)
+    brand_id = fields.Many2one("ordable.brand", string="Brand", required=True, ondelete="cascade")
+    ordable_id = fields.Integer(string="ordable_id")
+    payload_hash = fields.Char(string="Payload Hash")
+    last_push_at = fields.Datetime(string="Last Push")
+
+    _sql_constraints = [
+        ('res_brand_unique', 'unique(res_model, res_id, brand_id)',
+         'A record can only be pushed once per brand.'),
+    ]
+
+    @api.model
+    def _get_push_records(self, res_model, res_ids, brand):
+        """{res_id: push record} of the given records for the brand, in one query."""
+        records = self.sudo().search([
+            ('res_model', '=', res_model),
+            ('res_id', 'in', list(res_ids)),
+            ('brand_id', '=', brand.id),
+        ])
+        return {record.res_id: record for record in records}
@@ -6,7 +6,7 @@
 # Can be safely removed if reverting
 # ============================================
 
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import ValidationError
 import logging
 
@@ -52,6 +52,41 @@ class OrdableStatusMap(models.Model):
             else:
                 record.name = "New Mapping"
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.clear_caches()
+        return records
+
+    def write(self, vals):
+        result = super().write(vals)
+        # Also covers archiving/unarchiving through the 'active' field
+        self.clear_caches()
+        return result
+
+    def unlink(self):
+        result = super().unlink()
+        self.clear_caches()
+        return result
+
+    @api.model
+    @tools.ormcache()
+    def _get_status_map(self):
+        """
+        Return {stage_id: ordable_status} for all active mappings.
+        Cached per registry and cleared whenever a mapping changes.
+        """
+        mappings = self.sudo().search_read([], ['pos_stage_id', 'ordable_status'])
+        return tools.frozendict({
+            mapping['pos_stage_id'][0]: mapping['ordable_status']
+            for mapping in mappings
+        })
+
+    @api.model
+    def _get_status_for_stage(self, stage_id):
+        """Mapped Ordable status for a stage id, or False"""
+        return self._get_status_map().get(stage_id, False)
+
     @api.constrains('pos_stage_id')
     def _check_pos_stage(self):
         """Ensure POS stage exists"""
@@ -0,0 +1,167 @@
+import json
+import logging
+from datetime import timedelta
+
+from odoo import api, models, fields, SUPERUSER_ID, _
+
+from .ordable_outbox import (
+    DISPATCH_GRACE_SECONDS, OUTBOX_MAX_ATTEMPTS, OUTBOX_RETRY_BASE_SECONDS, OUTBOX_RETRY_MAX_SECONDS,
+    _deliver_in_background, _get_executor,
+)
+
+_logger = logging.getLogger(__name__)
+
+INBOX_BATCH_SIZE = 50
+
+
+class OrdableWebhookInbox(models.Model):
+    """
+    Webhooks received from Ordable, stored as received.
+
+    The HTTP handlers only validate the brand and save the raw body, so
+    Ordable gets its answer in milliseconds whatever the order size and has
+    no reason to retry. The import (customer, products, order, payment,
+    validation) runs from a background thread after commit, with the
+    drainer cron retrying failures and picking up rows a dead worker left.
+    """
+    _name = "ordable.webhook.inbox"
+    _description = "Ordable Webhook Inbox"
+    _order = "id desc"
+
+    kind = fields.Selection([
+        ('order', 'Order Created'),
+        ('payment', 'Payment'),
+    ], string="Kind", required=True)
+    brand_id = fields.Many2one("ordable.brand", string="Brand", required=True, ondelete="cascade")
+    tracking_id = fields.Char(string="Tracking ID", index=True)
+    payload = fields.Text(string="Payload", required=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Processed'),
+        ('failed', 'Failed'),
+    ], string="State", required=True, default='pending', index=True)
+    attempts = fields.Integer(string="Attempts", default=0)
+    next_attempt_at = fields.Datetime(string="Next Attempt", default=fields.Datetime.now, index=True)
+    last_attempt_at = fields.Datetime(string="Last Attempt")
+    last_error = fields.Text(string="Last Error")
+    result = fields.Text(string="Result")
+
+    @api.model
+    def _receive(self, kind, brand, payload):
+        """Store a webhook body (already parsed) and have it processed after commit."""
+        row = self.sudo().create({
+            'kind': kind,
+            'brand_id': brand.id,
+            'tracking_id': payload.get('tracking_id'),
+            'payload': json.dumps(payload),
+        })
+        row._dispatch_after_commit()
+        return row
+
+    def _dispatch_after_commit(self):
+        self._trigger_processor(fields.Datetime.now() + timedelta(seconds=DISPATCH_GRACE_SECONDS))
+        registry = self.env.registry
+        row_ids = self.ids
+
+        # Webhooks arrive on public routes: sudo() does not change the uid,
+        # the import would run as the public user
+        @self.env.cr.postcommit.add
+        def submit():
+            _get_executor().submit(_deliver_in_background, registry, SUPERUSER_ID, row_ids, self._name)
+
+    @api.model
+    def _trigger_processor(self, at=None):
+        cron = self.env.ref('ordable_connector.ir_cron_ordable_webhook_inbox', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger(at)
+
+    @api.model
+    def _cron_process_inbox(self, limit=INBOX_BATCH_SIZE, auto_commit=False):
+        rows = self.search([
+            ('state', '=', 'pending'),
+            ('next_attempt_at', '<=', fields.Datetime.now()),
+        ], order='next_attempt_at, id', limit=limit)
+        rows._process_due(auto_commit=auto_commit)
+
+        # A full batch means there is probably more waiting
+        if len(rows) == limit:
+            self._trigger_processor()
+        return len(rows)
+
+    def _process_due(self, auto_commit=False):
+        """
+        Process the rows that are still pending and due, oldest first. Each
+        row is locked with SKIP LOCKED first, so the cron and the background
+        dispatcher never import the same webhook twice.
+        """
+        for row in self.sorted('id'):
+            self.env.cr.execute("""
+                SELECT id FROM ordable_webhook_inbox
+                 WHERE id = %s AND state = 'pending' AND next_attempt_at <= %s
+                   FOR UPDATE SKIP LOCKED
+            """, [row.id, fields.Datetime.now()])
+            if not self.env.cr.fetchone():
+                continue
+            row.invalidate_recordset()
+            row._process()
+            if auto_commit:
+                self.env.cr.commit()
+
+    def action_retry(self):
+        self.write({'state': 'pending', 'next_attempt_at': fields.Datetime.now()})
+        self._dispatch_after_commit()
+
+    def _process(self):
+        """Import one webhook; a crash rolls back everything it created."""
+        self.ensure_one()
+        try:
+            with self.env.cr.savepoint():
+                result = self._import()
+        except Exception as e:
+            _logger.exception(f"[ORDABLE] Webhook inbox row {self.id} crashed while importing")
+            self.env.invalidate_all()
+            self._schedule_retry(str(e))
+            return
+        if result.get('in_progress'):
+            # Another webhook of the same order holds it; come back once it is done
+            self._schedule_retry(_("Order %s is being imported by another worker") % self.tracking_id)
+            return
+
+        vals = {
+            'attempts': self.attempts + 1,
+            'last_attempt_at': fields.Datetime.now(),
+            'result': json.dumps(result, default=str),
+        }
+        if result.get('success'):
+            vals.update(state='done', last_error=False)
+        else:
+            # Business errors (no open session, missing data...) need someone to look at them
+            vals.update(state='failed', last_error=result.get('error') or result.get('message'))
+            _logger.error(f"[ORDABLE] Webhook inbox row {self.id} failed: {vals['last_error']}")
+        self.write(vals)
+
+    def _import(self):
+        payload = json.loads(self.payload)
+        Import = self.env['ordable.order.import']
+        if self.kind == 'order':
+            return Import._import_order_webhook(payload, self.brand_id)
+        if self.kind == 'payment':
+            return Import._import_payment_webhook(payload, self.brand_id)
+        return {'success': False, 'error': _("Unknown webhook kind %s") % self.kind}
+
+    def _schedule_retry(self, error):
+        attempts = self.attempts + 1
+        now = fields.Datetime.now()
+        vals = {
+            'attempts': attempts,
+            'last_attempt_at': now,
+            'last_error': error,
+        }
+        if attempts >= OUTBOX_MAX_ATTEMPTS:
+            vals['state'] = 'failed'
+            _logger.error(f"[ORDABLE] Webhook inbox row {self.id} gave up after {attempts} attempts: {error}")
+        else:
+            delay = min(OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), OUTBOX_RETRY_MAX_SECONDS)
+            vals['next_attempt_at'] = now + timedelta(seconds=delay)
+            self._trigger_processor(vals['next_attempt_at'])
+        self.write(vals)
@@ -0,0 +1,23 @@
+from odoo import api, models, fields, _
+
+
+class PosCategory(models.Model):
+    _name = 'pos.category'
+    _inherit = ['pos.category', 'ordable.push.mixin']
+
+    _ordable_push_endpoint = 'categories'
+
+    def _is_ordable_pushable(self, brand):
+        # pos.category has no active field
+        self.ensure_one()
+        return brand.concept in self.concept_ids
+
+    def _get_ordable_push_payload(self, brand, push_records):
+        self.ensure_one()
+        return {
+            "name": self.name,
+            "sort_order": self.sequence,
+        }
+
+    def action_update_data_to_ordable(self):
+        return self._get_ordable_push_notification(self._push_catalogue_to_ordable())
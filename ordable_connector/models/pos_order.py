@@ -1,14 +1,37 @@
-from odoo import api, models, fields
+from odoo import api, models, fields, tools
+import hashlib
+import json
 import logging
 import requests
+import time
+from datetime import timedelta
+from odoo.addons.base_external_ordable.models.ordable_api import OrdableCircuitOpen
+from .ordable_order_import import _create_tracking_unique_index
+from .res_partner import normalize_ordable_phone
 
 _logger = logging.getLogger(__name__)
 
+# Orders whose payloads are built together during a bulk sync
+PAYLOAD_BATCH_SIZE = 200
+
 class PosOrder(models.Model):
     _inherit = "pos.order"
 
     ordable_id = fields.Integer(string="ordable_id")
     ordable_tracking_id = fields.Char(string="Ordable Traking ID")
+    ordable_payload_hash = fields.Char(string="Ordable Payload Hash", copy=False,
+                                       help="Hash of the last payload accepted by Ordable")
+    ordable_last_status = fields.Char(string="Ordable Status", copy=False, readonly=True,
+                                      help="Last status acknowledged by Ordable")
+
+    def init(self):
+        super().init()
+        # Duplicate check of incoming Ordable orders; only those carry a tracking id
+        _create_tracking_unique_index(self._cr, self._table)
+        # Bulk order sync: paid orders of a concept not coming from Ordable, by watermark
+        tools.create_index(
+            self._cr, 'pos_order_ordable_sync_index', self._table,
+            ['concept_id', 'write_date', 'id'], where="state = 'paid' AND ordable_tracking_id IS NULL")
 
     @api.model
     def create(self, vals):
@@ -17,116 +40,349 @@ class PosOrder(models.Model):
             vals['concept_id'] = 9
         rec = super(PosOrder, self).create(vals)
         if rec:
-            rec.send_order_to_ordable()
+            # Never wait on Ordable while the checkout transaction is open:
+            # the payload is queued here and delivered by the outbox drainer.
+            rec._enqueue_order_push()
         return rec
 
     def push_orders_to_ordable(self):
+        orders_by_brand = {}
         for rec in self:
-            rec.send_order_to_ordable()
+            brand = rec._get_order_push_brand()
+            if brand:
+                orders_by_brand.setdefault(brand, self.browse())
+                orders_by_brand[brand] |= rec
+        for brand, orders in orders_by_brand.items():
+            payloads = orders._get_order_payloads(brand)
+            for order in orders:
+                order._send_order_to_ordable(payloads[order.id], brand)
 
-    def send_order_to_ordable(self):
-        brand = self.env['ordable.brand'].search([('concept', '=', self.concept_id.id)])
+    def _get_order_push_brand(self):
+        """
+        Return the brand this order should be pushed to, or None when the
+        order must not be pushed (sync disabled, already synced or queued, no token).
+        """
+        Brand = self.env['ordable.brand'].sudo()
+        brand = Brand._find_brand_info(concept_id=self.concept_id.id)
 
         # Check if sync is enabled for this brand
-        if not brand.sync_ordable_info:
-            _logger.info(f"Skipping brand {brand.name}, sync_ordable_info is disabled")
-            return
+        if not (brand and brand.sync_ordable_info):
+            _logger.info(f"Skipping brand {brand and brand.name}, sync_ordable_info is disabled")
+            return None
 
         # Check if order already has ordable_id (already synced)
-        if self.ordable_id:
+        if self.ordable_id or self.ordable_payload_hash:
             _logger.info(f"Skipping order {self.id}, already synced to Ordable with ordable_id: {self.ordable_id}")
-            return
+            return None
+
+        # A push still queued in the outbox would post the order a second time
+        if self.id in self.env['ordable.outbox']._get_queued_order_ids():
+            _logger.info(f"Skipping order {self.id}, its push is queued in the Ordable outbox")
+            return None
 
         if not brand.ordable_api_token:
             _logger.info(f"Skipping brand {brand.name}, no API token")
-        else:
+            return None
+        return Brand.browse(brand.id)
+
+    def send_order_to_ordable(self):
+        brand = self._get_order_push_brand()
+        if brand:
             order_payload = self._get_order_payload(brand)
             self._send_order_to_ordable(order_payload, brand)
 
-    def send_orders_to_ordable(self):
-        OrdableBrand = self.env['ordable.brand'].sudo()
-        OrdableProduct = self.env['ordable.product'].sudo()
+    def _enqueue_order_push(self):
+        brand = self._get_order_push_brand()
+        if brand:
+            self.env['ordable.outbox']._enqueue(
+                'order', brand, 'orders', self._get_order_payload(brand), pos_order_id=self.id)
 
+    def send_orders_to_ordable(self):
         brands = self.env["ordable.brand"].sudo().search([("sync_ordable_info", "=", True)])
+        for brand in brands.filtered(lambda b: not b.ordable_api_token):
+            _logger.info(f"Skipping brand {brand.name}, no API token")
+        brands = brands.filtered('ordable_api_token')
+        # One worker per concept when ordable.sync_concurrency > 1
+        return self.env['ordable.api']._run_partitioned(
+            'pos.order', '_sync_brands_orders', 'ordable.brand', brands._partition_by_concept())
+
+    @api.model
+    def _sync_brands_orders(self, brands):
+        results = {}
         for brand in brands:
-            if not brand.ordable_api_token:
-                _logger.info(f"Skipping brand {brand.name}, no API token")
-                continue
-            orders = self.search([('concept_id', '=', brand.concept.id), ('state', '=', 'paid')])
+            results[brand.id] = self._sync_brand_orders(brand)
+        return results
 
-            for order in orders:
-                order_payload = order._get_order_payload(brand)
-                self._send_order_to_ordable(order_payload, brand)
+    def _get_brand_sync_domain(self, brand):
+        """
+        Paid orders of the brand's concept changed since the brand's watermark
+        and never pushed yet. Orders that came from Ordable (they carry a
+        tracking id) are never pushed back, and an order Ordable accepted
+        (it has an Ordable ID or a payload hash) is never posted again: a
+        second POST would create a second order there.
+        """
+        domain = [
+            ('concept_id', '=', brand.concept.id),
+            ('state', '=', 'paid'),
+            ('ordable_tracking_id', '=', False),
+            ('ordable_id', '=', False),
+            ('ordable_payload_hash', '=', False),
+        ]
+        # Orders still queued in the outbox are pushed by it
+        queued_ids = self.env['ordable.outbox']._get_queued_order_ids()
+        if queued_ids:
+            domain.append(('id', 'not in', list(queued_ids)))
+        if brand.ordable_order_sync_date:
+            domain += [
+                '|', ('write_date', '>', brand.ordable_order_sync_date),
+                '&', ('write_date', '=', brand.ordable_order_sync_date),
+                ('id', '>', brand.ordable_order_sync_id),
+            ]
+        return domain
+
+    def _sync_brand_orders(self, brand):
+        """
+        Push the orders of one brand not pushed yet, then move the brand's
+        watermark forward.
+
+        The watermark stops at the first failed order so it is picked up again
+        on the next run; orders after it that did go through are skipped then
+        as they have their payload hash.
+        """
+        orders = self.sudo().search(self._get_brand_sync_domain(brand), order='write_date, id')
+        deadline = self.env['ordable.api']._get_deadline(brand)
+        watermark = None
+        watermark_frozen = False
+        pushed = skipped = failed = 0
+        stop = False
+
+        for offset in range(0, len(orders), PAYLOAD_BATCH_SIZE):
+            batch = orders[offset:offset + PAYLOAD_BATCH_SIZE]
+            # Read before sending: a successful push writes on the order
+            markers = {order.id: (order.write_date, order.id) for order in batch}
+            payloads = batch._get_order_payloads(brand)
+            for order in batch:
+                if deadline and time.monotonic() >= deadline:
+                    _logger.warning(f"Order sync for brand {brand.name} stopped: deadline reached")
+                    stop = True
+                    break
+                order_payload = payloads[order.id]
+                if order.ordable_id or order.ordable_payload_hash:
+                    # Already accepted by Ordable, never posted twice
+                    skipped += 1
+                else:
+                    result = order._send_order_to_ordable(order_payload, brand, deadline=deadline)
+                    if not result.get("error"):
+                        pushed += 1
+                    else:
+                        failed += 1
+                        watermark_frozen = True
+                        if result.get("retry_after"):
+                            # Endpoint down or throttling us: stop instead of failing every order,
+                            # the frozen watermark makes the next run resume from here
+                            _logger.warning(f"Order sync for brand {brand.name} stopped: {result['error']}")
+                            stop = True
+                            break
+
+                if not watermark_frozen:
+                    watermark = markers[order.id]
+            if stop:
+                break
+
+        if watermark:
+            brand.sudo().write({
+                'ordable_order_sync_date': watermark[0],
+                'ordable_order_sync_id': watermark[1],
+            })
+        _logger.info(
+            f"Order sync for brand {brand.name}: {pushed} pushed, {skipped} already synced, {failed} failed"
+        )
+        return {'pushed': pushed, 'skipped': skipped, 'failed': failed}
+
+    @api.model
+    def _hash_ordable_payload(self, payload):
+        return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    @api.model
+    def _extract_ordable_id(self, response_data):
+        """Ordable answers with either {"data": {...}} or {"data": [{...}]}"""
+        response_value = response_data.get("data") if isinstance(response_data, dict) else None
+        if isinstance(response_value, dict):
+            return response_value.get("id")
+        if isinstance(response_value, list) and response_value:
+            return response_value[0].get("id")
+        return None
 
     def _get_order_payload(self, brand):
-        OrdableProduct = self.env['ordable.product'].sudo()
-
-        # Get phone or mobile
-        mobile = self.partner_id.phone or self.partner_id.mobile or "12345678"
-        # Keep only digits
-        mobile_digits_only = ''.join(filter(str.isdigit, mobile))
-        # Take last 8 digits
-        last_8_mobile_digits = mobile_digits_only[-8:]
-        # Add +965
-        final_mobile_number = f"+965{last_8_mobile_digits}"
-
-        order_payload = {
-            "branchId": brand.branch,
-            "status": "Complete",
-            "expectedTime": self.date_order.strftime('%Y-%m-%dT%H:%M'),
-            "source": "Odoo",
-            "orderType": "delivery",
-            "deliveryRate": 0,
-            "IsAsap": True,
-            "paymentComplete": True,
-            "paymentMethod": "cash",
-            "customer": {
-                "name": self.partner_id.name or "Guest",
-                "phoneNumber": final_mobile_number,
-                "email": self.partner_id.email or ""
-            },
-            "deliveryAddress": {
-                "area": self.partner_id.city or "Area",
-                "street": self.partner_id.street or "street"
-            },
-            "items": [],
-            "discounts": []
-        }
-        # Add items
-        for line in self.lines:
-            ordable_product = OrdableProduct.search([
-                ('name', '=', line.product_id.name),
-                ('concept', '=', brand.concept.id)
-            ], limit=1)
-            if ordable_product:
-                order_payload["items"].append({
-                    "id": ordable_product.ordable_id,
-                    "price": line.price_unit,
-                    "quantity": line.qty,
-                    "options": []
-                })
-            else:
-                _logger.warning(f"Product {line.product_id.name} not found for brand {brand.name}")
+        self.ensure_one()
+        return self._get_order_payloads(brand)[self.id]
+
+    def _get_order_payloads(self, brand):
+        """
+        Build the Ordable payload of every order in self at once.
+
+        Lines, products and partners are read in bulk through the prefetch and
+        the product → Ordable id maps of the brand's concept are loaded once
+        for all lines: through the product links of the catalogue first, by
+        name for products without one.
+        A line that is an Ordable option rather than a product is sent in the
+        options of the item before it, the way Ordable orders come in.
+        Returns {order_id: payload}, identical to _get_order_payload per order.
+        """
+        products = self.lines.product_id
+        ordable_ids = self._get_ordable_product_map(brand, products)
+        option_ids = self._get_ordable_option_map(brand, products.filtered(lambda p: p.id not in ordable_ids))
+
+        payloads = {}
+        for order in self:
+            partner = order.partner_id
+            order_payload = {
+                "branchId": brand.branch,
+                "status": "Complete",
+                "expectedTime": order.date_order.strftime('%Y-%m-%dT%H:%M'),
+                "source": "Odoo",
+                "orderType": "delivery",
+                "deliveryRate": 0,
+                "IsAsap": True,
+                "paymentComplete": True,
+                "paymentMethod": "cash",
+                "customer": {
+                    "name": partner.name or "Guest",
+                    "phoneNumber": self._format_ordable_phone(partner.phone or partner.mobile),
+                    "email": partner.email or ""
+                },
+                "deliveryAddress": {
+                    "area": partner.city or "Area",
+                    "street": partner.street or "street"
+                },
+                "items": [],
+                "discounts": []
+            }
+            # Add items
+            for line in order.lines:
+                product = line.product_id
+                ordable_id = ordable_ids.get(product.id)
+                items = order_payload["items"]
+                if ordable_id is not None:
+                    items.append({
+                        "id": ordable_id,
+                        "price": line.price_unit,
+                        "quantity": line.qty,
+                        "options": []
+                    })
+                elif items and product.id in option_ids:
+                    parent = items[-1]
+                    option_id = option_ids[product.id].get(parent["id"], option_ids[product.id][None])
+                    parent["options"].append({
+                        "id": option_id,
+                        "price": line.price_unit,
+                        "quantity": line.qty,
+                    })
+                else:
+                    _logger.warning(f"Product {product.name} not found for brand {brand.name}")
+            payloads[order.id] = order_payload
+        return payloads
+
+    def _get_ordable_product_map(self, brand, products):
+        """
+        {product.product id: ordable_id} for the brand's concept: linked
+        ordable.product first, then the first one of the same name.
+        """
+        ordable_ids = {}
+        if not products:
+            return ordable_ids
+        records = self.env['ordable.product'].sudo().search_read([
+            ('concept', '=', brand.concept.id),
+            ('product_id', 'in', products.ids),
+        ], ['product_id', 'ordable_id'], order='id', load=None)
+        for record in records:
+            ordable_ids.setdefault(record['product_id'], record['ordable_id'])
+
+        unlinked = products.filtered(lambda p: p.id not in ordable_ids)
+        by_name = self.env['ordable.catalogue.index']._lookup(
+            'ordable.product', brand.concept.id, unlinked.mapped('name'))
+        for product in unlinked:
+            if product.name in by_name:
+                ordable_ids[product.id] = by_name[product.name]
+        return ordable_ids
+
+    def _get_ordable_option_map(self, brand, products):
+        """
+        {product.product id: {parent product ordable_id: option ordable_id}}
+        for the brand's concept, linked options first, then by name. The None
+        key holds the first matching option, used when the option is not
+        listed under the item's product.
+        """
+        option_ids = {}
+        if not products:
+            return option_ids
+        Option = self.env['ordable.product.option'].sudo()
+        fields = ['product_id', 'name', 'ordable_id', 'parent_ordable_id']
+        linked = Option.search_read([
+            ('concept', '=', brand.concept.id),
+            ('product_id', 'in', products.ids),
+        ], fields, order='id', load=None)
+        for record in linked:
+            by_parent = option_ids.setdefault(record['product_id'], {None: record['ordable_id']})
+            by_parent.setdefault(record['parent_ordable_id'], record['ordable_id'])
+
+        unlinked = products.filtered(lambda p: p.id not in option_ids)
+        if not unlinked:
+            return option_ids
+        product_ids_by_name = {}
+        for product in unlinked:
+            product_ids_by_name.setdefault(product.name, []).append(product.id)
+        records = Option.search_read([
+            ('name', 'in', list(product_ids_by_name)),
+            ('concept', '=', brand.concept.id)
+        ], fields, order='id', load=None)
+        for record in records:
+            for product_id in product_ids_by_name[record['name']]:
+                by_parent = option_ids.setdefault(product_id, {None: record['ordable_id']})
+                by_parent.setdefault(record['parent_ordable_id'], record['ordable_id'])
+        return option_ids
+
+    @api.model
+    def _format_ordable_phone(self, phone):
+        """Last 8 digits of the number with the +965 prefix Ordable expects."""
+        return f"+965{normalize_ordable_phone(phone) or '12345678'}"
+
+    def _send_order_to_ordable(self, payload, brand, deadline=None):
+        result = self._post_order_to_ordable(payload, brand, deadline=deadline)
+        if not result.get("error"):
+            self._record_ordable_push(payload, result)
+        return result
 
-        return order_payload
+    def _record_ordable_push(self, payload, result):
+        """Remember an accepted push: payload hash, and the Ordable ID when one came back."""
+        vals = {'ordable_payload_hash': self._hash_ordable_payload(payload)}
+        if result.get("id"):
+            vals['ordable_id'] = result["id"]
+        else:
+            _logger.warning(f"Order {self.id} accepted by Ordable but no Ordable ID returned")
+        self.sudo().write(vals)
 
-    def _send_order_to_ordable(self, payload, brand):
-        headers = {
-            "Authorization": brand.ordable_api_token,
-            "Content-Type": "application/json"
-        }
-        url = f"{brand.ordable_base_url.rstrip('/')}/orders/"
+    def _post_order_to_ordable(self, payload, brand, deadline=None):
+        """POST the order, without writing anything: returns {"id": ...} or a dict with an 'error' key."""
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = self.env['ordable.api']._request(brand, 'POST', 'orders/', payload=payload, deadline=deadline)
             if response.status_code in [200, 201]:
-                self.sudo().write({
-                    'ordable_id': 1
-                })
+                try:
+                    ordable_id = self._extract_ordable_id(response.json())
+                except ValueError:
+                    ordable_id = None
                 _logger.info(f"Order sent successfully for brand {brand.name}")
+                return {"id": ordable_id, "response": response.text}
             else:
                 _logger.error(f"Failed to send order for brand {brand.name}: {response.text}")
+                return {"error": f"HTTP {response.status_code}", "response": response.text,
+                        "retry_after": self.env['ordable.api']._get_retry_after(response)}
+        except OrdableCircuitOpen as e:
+            _logger.warning(f"Not sending order {self.id} for brand {brand.name}: {e}")
+            return {"error": str(e), "retry_after": e.retry_after}
         except Exception as e:
             _logger.error(f"Exception sending order for brand {brand.name}: {str(e)}")
+            return {"error": str(e)}
 
     # ============================================
     # ORDABLE STATUS MAPPING - API INTEGRATION
@@ -175,11 +431,8 @@ class PosOrder(models.Model):
             _logger.debug(f"Order {self.name}: No concept assigned")
             return
 
-        # STEP 5: Get brand configuration from concept
-        brand = self.env['ordable.brand'].search([
-            ('concept', '=', self.concept_id.id),
-            ('sync_ordable_info', '=', True)
-        ], limit=1)
+        # STEP 5: Get brand configuration from concept (cached brand registry)
+        brand = self.env['ordable.brand']._find_brand_info(concept_id=self.concept_id.id, sync_only=True)
 
         if not brand:
             _logger.info(f"Order {self.name}: No active Ordable brand for concept '{self.concept_id.name}'")
@@ -189,11 +442,53 @@ class PosOrder(models.Model):
             _logger.warning(f"Order {self.name}: Missing API credentials for brand '{brand.name}'")
             return
 
-        # STEP 6: All checks passed - Call API
+        # STEP 6: All checks passed - Queue the API call
         _logger.info(
             f"Order {self.name}: Updating Ordable status to '{ordable_status}' for stage '{self.order_stage_id.name}'"
         )
-        self._call_ordable_status_api(ordable_status, brand)
+        self._queue_ordable_status(ordable_status, self.env['ordable.brand'].browse(brand.id))
+
+    def _queue_ordable_status(self, ordable_status, brand):
+        """
+        Coalesce status updates through the outbox.
+
+        An order has at most one pending status row. Stage changes within the
+        coalescing window overwrite its payload, so only the final status is
+        sent, and a status equal to the last acknowledged one is dropped.
+        Rows already being sent are never touched.
+        """
+        Outbox = self.env['ordable.outbox'].sudo()
+        rows = Outbox.search([
+            ('pos_order_id', '=', self.id),
+            ('kind', '=', 'status'),
+            ('state', 'in', ('pending', 'sending', 'sent')),
+        ])
+        # Rows being sent, claimed right now or accepted but not recorded yet
+        # are left alone, a new row follows them
+        pending = rows.filtered(lambda row: row.state == 'pending')._lock_pending()[:1]
+        in_flight = rows - pending
+
+        if ordable_status == self.ordable_last_status and not in_flight:
+            _logger.debug(f"Order {self.name}: Ordable already has status '{ordable_status}'")
+            # A change back to the acknowledged status cancels anything still queued
+            pending.unlink()
+            return
+
+        payload = self._build_ordable_status_payload(ordable_status)
+        if pending:
+            pending.write({'payload': json.dumps(payload), 'brand_id': brand.id})
+        else:
+            window = self._get_ordable_status_coalesce_seconds()
+            Outbox._enqueue('status', brand, 'order_status/', payload, method='PATCH',
+                            pos_order_id=self.id, at=fields.Datetime.now() + timedelta(seconds=window))
+
+    @api.model
+    def _get_ordable_status_coalesce_seconds(self):
+        value = self.env['ir.config_parameter'].sudo().get_param('ordable.status_coalesce_seconds', '5')
+        try:
+            return max(0, int(value))
+        except ValueError:
+            return 5
 
     def _get_ordable_status_for_stage(self, stage_id):
         """
@@ -203,16 +498,10 @@ class PosOrder(models.Model):
         if not stage_id:
             return False
 
-        mapping = self.env['ordable.status.map'].search([
-            ('pos_stage_id', '=', stage_id),
-            ('active', '=', True)
-        ], limit=1)
-
-        if mapping:
-            _logger.debug(f"Found mapping: Stage '{mapping.pos_stage_id.name}' → Ordable '{mapping.ordable_status}'")
-            return mapping.ordable_status
-        else:
-            return False
+        ordable_status = self.env['ordable.status.map']._get_status_for_stage(stage_id)
+        if ordable_status:
+            _logger.debug(f"Found mapping: Stage {stage_id} → Ordable '{ordable_status}'")
+        return ordable_status
 
     def _build_ordable_status_payload(self, ordable_status):
         """
@@ -240,33 +529,43 @@ class PosOrder(models.Model):
         Call Ordable API to update order status.
         Handles request/response and logs results.
         """
+        result = self._patch_ordable_status(ordable_status, brand)
+        if not result.get("error"):
+            self._record_ordable_status(ordable_status)
+        return result
+
+    def _record_ordable_status(self, ordable_status):
+        self.sudo().write({'ordable_last_status': ordable_status})
+
+    def _patch_ordable_status(self, ordable_status, brand):
+        """Send the status update, without writing anything. Returns a dict with an 'error' key on failure."""
         # Build payload
         payload = self._build_ordable_status_payload(ordable_status)
 
-        # Prepare API call
-        url = f"{brand.ordable_base_url.rstrip('/')}/order_status/"
-        headers = {
-            'Authorization': brand.ordable_api_token,
-            'Content-Type': 'application/json',
-            'Accept': 'application/json'
-        }
-
         try:
-            _logger.info(f"Calling Ordable API: {url}")
+            _logger.info(f"Calling Ordable API: order_status/ for brand {brand.name}")
             _logger.debug(f"Payload: {payload}")
 
-            response = requests.patch(url, json=payload, headers=headers, timeout=10)
+            response = self.env['ordable.api']._request(brand, 'PATCH', 'order_status/', payload=payload)
             if response.status_code in [200, 201]:
                 _logger.info(
                     f"Order {self.name}: Ordable status updated successfully. "
                     f"Response: {response.text}"
                 )
+                return {"response": response.text}
             else:
                 error_msg = f"API returned {response.status_code}: {response.text}"
                 _logger.error(f"Order {self.name}: Ordable API error - {error_msg}")
+                retry_after = self.env['ordable.api']._get_retry_after(response)
+                if retry_after:
+                    return {"error": error_msg, "retry_after": retry_after}
+
+        except OrdableCircuitOpen as e:
+            _logger.warning(f"Order {self.name}: {e}, status update deferred")
+            return {"error": str(e), "retry_after": e.retry_after}
 
         except requests.exceptions.Timeout:
-            error_msg = "API request timeout (10s)"
+            error_msg = "API request timeout"
             _logger.error(f"Order {self.name}: {error_msg}")
 
         except requests.exceptions.ConnectionError as e:
@@ -277,5 +576,7 @@ class PosOrder(models.Model):
             error_msg = f"Unexpected error: {str(e)}"
             _logger.error(f"Order {self.name}: {error_msg}")
 
+        return {"error": error_msg}
+
     # END ORDABLE STATUS MAPPING - API INTEGRATION
     # ============================================
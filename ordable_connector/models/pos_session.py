@@ -0,0 +1,48 @@
+from odoo import api, models
+
+# Fields the cached references of the Ordable order import depend on
+SESSION_REFERENCE_FIELDS = {'state', 'config_id', 'user_id'}
+PAYMENT_METHOD_REFERENCE_FIELDS = {'name', 'active', 'company_id'}
+
+
+class PosSession(models.Model):
+    _inherit = 'pos.session'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        sessions = super().create(vals_list)
+        self.clear_caches()
+        return sessions
+
+    def write(self, vals):
+        result = super().write(vals)
+        # Opening and closing, not the many writes of a running session
+        if SESSION_REFERENCE_FIELDS & set(vals):
+            self.clear_caches()
+        return result
+
+    def unlink(self):
+        result = super().unlink()
+        self.clear_caches()
+        return result
+
+
+class PosPaymentMethod(models.Model):
+    _inherit = 'pos.payment.method'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        methods = super().create(vals_list)
+        self.clear_caches()
+        return methods
+
+    def write(self, vals):
+        result = super().write(vals)
+        if PAYMENT_METHOD_REFERENCE_FIELDS & set(vals):
+            self.clear_caches()
+        return result
+
+    def unlink(self):
+        result = super().unlink()
+        self.clear_caches()
+        return result
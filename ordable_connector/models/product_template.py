@@ -0,0 +1,101 @@
+from odoo import api, models, fields, _
+
+from .ordable_order_import import DELIVERY_PRODUCT_NAME
+
+
+class ProductTemplate(models.Model):
+    _name = 'product.template'
+    _inherit = ['product.template', 'ordable.push.mixin']
+
+    _ordable_push_endpoint = 'products'
+    # Fields of the catalogue index (ordable.catalogue.index)
+    _ordable_index_fields = {'name', 'concept_ids', 'active'}
+
+    # Fields of the cached delivery product (ordable.order.import)
+    _ordable_delivery_fields = {'name', 'type', 'active'}
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['ordable.catalogue.index']._notify_change('product.product', records.concept_ids.ids)
+        if any(vals.get('name') == DELIVERY_PRODUCT_NAME for vals in vals_list):
+            self.clear_caches()
+        return records
+
+    def write(self, vals):
+        if self._ordable_delivery_fields & set(vals) and (
+                vals.get('name') == DELIVERY_PRODUCT_NAME or DELIVERY_PRODUCT_NAME in self.mapped('name')):
+            self.clear_caches()
+        if not self._ordable_index_fields & set(vals):
+            return super().write(vals)
+        concepts = self.concept_ids
+        result = super().write(vals)
+        self.env['ordable.catalogue.index']._notify_change('product.product', (concepts | self.concept_ids).ids)
+        return result
+
+    def unlink(self):
+        self.env['ordable.catalogue.index']._notify_change('product.product', self.concept_ids.ids)
+        if DELIVERY_PRODUCT_NAME in self.mapped('name'):
+            self.clear_caches()
+        return super().unlink()
+
+    def _prepare_ordable_push(self, brand):
+        categories = self.env['ordable.push.record']._get_push_records(
+            'pos.category', self.pos_categ_id.ids, brand)
+        return {'categories': categories}
+
+    def _get_ordable_push_payload(self, brand, push_records):
+        self.ensure_one()
+        category = push_records['categories'].get(self.pos_categ_id.id)
+        return {
+            "name": self.name,
+            "name_ar": self.name_secondary or "",
+            "price": self.list_price,
+            "category": category.ordable_id if category else None,
+            "is_available": self.available_in_pos,
+        }
+
+    def action_update_product_data_to_ordable(self):
+        return self._get_ordable_push_notification(self._push_catalogue_to_ordable())
+
+
+class ProductProduct(models.Model):
+    _inherit = 'product.product'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['ordable.catalogue.index']._notify_change('product.product', records.concept_ids.ids)
+        return records
+
+    def write(self, vals):
+        result = super().write(vals)
+        if 'active' in vals or 'product_tmpl_id' in vals:
+            self.env['ordable.catalogue.index']._notify_change('product.product', self.concept_ids.ids)
+        return result
+
+    def unlink(self):
+        self.env['ordable.catalogue.index']._notify_change('product.product', self.concept_ids.ids)
+        return super().unlink()
+
+    @api.model
+    def _get_ordable_linked_products(self, concept, ordable_ids, option=False):
+        """{ordable_id: product id} of the Ordable products (or options) of the concept linked to a product."""
+        ordable_ids = [ordable_id for ordable_id in set(ordable_ids) if ordable_id]
+        if not ordable_ids:
+            return {}
+        model = 'ordable.product.option' if option else 'ordable.product'
+        records = self.env[model].sudo().search_read([
+            ('concept', '=', concept.id),
+            ('ordable_id', 'in', ordable_ids),
+            ('product_id', '!=', False),
+        ], ['ordable_id', 'product_id'], order='id', load=None)
+        links = {}
+        for record in records:
+            links.setdefault(record['ordable_id'], record['product_id'])
+        return links
+
+    @api.model
+    def _find_concept_products(self, concept, names):
+        """{name: product id} of the first product of each name in the concept, through the catalogue index."""
+        return self.env['ordable.catalogue.index']._lookup('product.product', concept.id, names)
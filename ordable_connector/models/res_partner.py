@@ -0,0 +1,135 @@
+import logging
+import re
+
+from odoo import api, fields, models, tools
+
+_logger = logging.getLogger(__name__)
+
+PHONE_KEY_BACKFILL_BATCH_SIZE = 1000
+PHONE_KEY_BACKFILL_PARAM = 'ordable.phone_key_backfill_id'
+PHONE_KEY_BACKFILL_DONE = 'done'
+
+
+def normalize_ordable_phone(phone):
+    """
+    Canonical form of a phone number, shared by both directions of the
+    Ordable sync: its last 8 digits, i.e. a Kuwaiti number without country
+    code or formatting. False when the number has no digit.
+    """
+    digits = ''.join(filter(str.isdigit, phone or ''))
+    return digits[-8:] or False
+
+
+class ResPartner(models.Model):
+    _inherit = 'res.partner'
+
+    # Normalized phone and mobile incoming Ordable orders match customers on
+    ordable_phone_key = fields.Char(
+        string="Ordable Phone Key", compute='_compute_ordable_phone_key', store=True, copy=False)
+    ordable_mobile_key = fields.Char(
+        string="Ordable Mobile Key", compute='_compute_ordable_phone_key', store=True, copy=False)
+
+    def _auto_init(self):
+        # Created by hand so installing does not compute them for every partner
+        # in one transaction; _cron_backfill_ordable_phone_key fills them in chunks
+        if not tools.column_exists(self._cr, self._table, 'ordable_phone_key'):
+            tools.create_column(self._cr, self._table, 'ordable_phone_key', 'varchar')
+        if not tools.column_exists(self._cr, self._table, 'ordable_mobile_key'):
+            tools.create_column(self._cr, self._table, 'ordable_mobile_key', 'varchar')
+            # The phone key used to hold the mobile of partners without a phone:
+            # backfill both keys again from the start
+            self._cr.execute("DELETE FROM ir_config_parameter WHERE key = %s", [PHONE_KEY_BACKFILL_PARAM])
+            self.env['ir.config_parameter'].clear_caches()
+        return super()._auto_init()
+
+    def init(self):
+        super().init()
+        tools.create_index(self._cr, 'res_partner_ordable_phone_key_index', self._table, ['ordable_phone_key'],
+                           where='ordable_phone_key IS NOT NULL')
+        tools.create_index(self._cr, 'res_partner_ordable_mobile_key_index', self._table, ['ordable_mobile_key'],
+                           where='ordable_mobile_key IS NOT NULL')
+        if self._ordable_phone_key_backfilled():
+            self._drop_ordable_phone_fallback_indexes()
+        else:
+            # Serve the fallback lookup on the raw numbers until every partner has its keys
+            tools.create_index(self._cr, 'res_partner_ordable_phone_index', self._table, ['phone'],
+                               where='phone IS NOT NULL')
+            tools.create_index(self._cr, 'res_partner_ordable_mobile_index', self._table, ['mobile'],
+                               where='mobile IS NOT NULL')
+
+    def _drop_ordable_phone_fallback_indexes(self):
+        # Replaced by the keys once they are backfilled
+        tools.drop_index(self._cr, 'res_partner_ordable_phone_index', self._table)
+        tools.drop_index(self._cr, 'res_partner_ordable_mobile_index', self._table)
+
+    @api.depends('phone', 'mobile')
+    def _compute_ordable_phone_key(self):
+        for partner in self:
+            partner.ordable_phone_key = normalize_ordable_phone(partner.phone)
+            partner.ordable_mobile_key = normalize_ordable_phone(partner.mobile)
+
+    @api.model
+    def _find_by_ordable_phone(self, phone):
+        """First customer whose phone or mobile matches ``phone`` once normalized."""
+        key = normalize_ordable_phone(phone)
+        if not key:
+            return self.browse()
+        partner = self.search(['|', ('ordable_phone_key', '=', key), ('ordable_mobile_key', '=', key)], limit=1)
+        if partner or self._ordable_phone_key_backfilled():
+            return partner
+        # Partners not backfilled yet have no key
+        phone = phone.strip()
+        normalized_phone = re.sub(r'^\+965', '', phone)
+        return self.search([
+            '|', '|', '|',
+            ('phone', '=', phone),
+            ('mobile', '=', phone),
+            ('phone', '=', normalized_phone),
+            ('mobile', '=', normalized_phone)
+        ], limit=1)
+
+    @api.model
+    def _ordable_phone_key_backfilled(self):
+        param = self.env['ir.config_parameter'].sudo().get_param(PHONE_KEY_BACKFILL_PARAM)
+        return param == PHONE_KEY_BACKFILL_DONE
+
+    @api.model
+    def _cron_backfill_ordable_phone_key(self, limit=PHONE_KEY_BACKFILL_BATCH_SIZE, auto_commit=False):
+        """
+        Compute the phone and mobile keys of the partners existing before
+        them, by id chunks. The last id handled is kept in a system parameter
+        so a run resumes where the previous one stopped; the cron retriggers
+        itself until every partner is done.
+        """
+        Param = self.env['ir.config_parameter'].sudo()
+        last_id = Param.get_param(PHONE_KEY_BACKFILL_PARAM) or '0'
+        if last_id == PHONE_KEY_BACKFILL_DONE:
+            return 0
+        self.env.cr.execute("""
+            SELECT id FROM res_partner
+             WHERE id > %s
+               AND ((ordable_phone_key IS NULL AND phone IS NOT NULL)
+                    OR (ordable_mobile_key IS NULL AND mobile IS NOT NULL))
+          ORDER BY id
+             LIMIT %s
+        """, [int(last_id), limit])
+        ids = [row[0] for row in self.env.cr.fetchall()]
+        if not ids:
+            Param.set_param(PHONE_KEY_BACKFILL_PARAM, PHONE_KEY_BACKFILL_DONE)
+            self._drop_ordable_phone_fallback_indexes()
+            _logger.info("[ORDABLE] Partner phone keys backfilled")
+            return 0
+
+        partners = self.browse(ids)
+        self.env.add_to_compute(self._fields['ordable_phone_key'], partners)
+        self.env.add_to_compute(self._fields['ordable_mobile_key'], partners)
+        self.env.flush_all()
+        Param.set_param(PHONE_KEY_BACKFILL_PARAM, str(ids[-1]))
+        if auto_commit:
+            self.env.cr.commit()
+        self.env.invalidate_all()
+
+        cron = self.env.ref('ordable_connector.ir_cron_ordable_partner_phone_key', raise_if_not_found=False)
+        if cron:
+            cron.sudo()._trigger()
+        return len(ids)
@@ -1,8 +1,10 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
 import requests
 import json
 import logging
 
+from .ordable_order_import import _create_tracking_unique_index
+
 _logger = logging.getLogger(__name__)
 
 
@@ -11,4 +13,34 @@ class ProductTemplate(models.Model):
 
     ordable_id = fields.Char(string="Ordable Order ID")
     ordable_tracking_id = fields.Char(string="Ordable Traking ID")
-    concept_id = fields.Many2one("res.concept", string="Concept")
\ No newline at end of file
+    concept_id = fields.Many2one("res.concept", string="Concept")
+    # Deferred processing (ordable.brand.ordable_defer_sale_processing): the
+    # import only creates the draft, ordable.order.import confirms it later
+    ordable_processing_state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Processed'),
+        ('failed', 'Failed'),
+    ], string="Ordable Processing", copy=False, readonly=True)
+    ordable_pay_on_process = fields.Boolean(
+        string="Pay On Processing", copy=False, readonly=True,
+        help="The order webhook reported the payment complete: the invoice is paid in full when processed")
+    ordable_pending_payments = fields.Text(
+        string="Pending Payments", copy=False, readonly=True,
+        help="Payments of payment webhooks received before the order was processed, as JSON")
+    ordable_processing_error = fields.Text(string="Processing Error", copy=False, readonly=True)
+
+    def init(self):
+        super().init()
+        # Duplicate check of incoming Ordable orders
+        _create_tracking_unique_index(self._cr, self._table)
+        # Deferred processing batches
+        tools.create_index(
+            self._cr, 'sale_order_ordable_processing_index', self._table,
+            ['id'], where="ordable_processing_state = 'pending'")
+
+    def action_ordable_retry_processing(self):
+        self.filtered(lambda order: order.ordable_processing_state == 'failed').write({
+            'ordable_processing_state': 'pending',
+            'ordable_processing_error': False,
+        })
+        self.env['ordable.order.import']._trigger_sale_order_processing()
\ No newline at end of file
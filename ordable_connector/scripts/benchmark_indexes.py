@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Show the query plans of the Ordable hot lookups before and after the
+indexes declared by ordable_connector.
+
+The tables are synthetic copies of the columns involved, created as
+temporary tables in the given database and filled with generate_series, so
+nothing in the Odoo tables is touched. Run it against a scratch database:
+
+    python3 benchmark_indexes.py "dbname=scratch" --orders 2000000
+
+Sizes default to a busy production instance; the plans and timings printed
+are those measured on the server it runs against.
+"""
+import argparse
+import time
+
+import psycopg2
+
+SETUP = [
+    """CREATE TEMP TABLE pos_order AS
+       SELECT i AS id,
+              (i %% 20) + 1 AS concept_id,
+              CASE WHEN i %% 3 = 0 THEN 'paid' ELSE 'done' END AS state,
+              CASE WHEN i %% 4 = 0 THEN 'TRK' || i END AS ordable_tracking_id,
+              CASE WHEN i %% 4 = 0 THEN i END AS ordable_id,
+              now() - (i || ' seconds')::interval AS write_date
+         FROM generate_series(1, %(orders)s) i""",
+    """CREATE TEMP TABLE ordable_product AS
+       SELECT i AS id, (i %% 20) + 1 AS concept, i AS ordable_id, 'Product ' || i AS name,
+              CASE WHEN i %% 2 = 0 THEN i END AS product_id
+         FROM generate_series(1, %(products)s) i""",
+    """CREATE TEMP TABLE res_partner AS
+       SELECT i AS id,
+              CASE WHEN i %% 2 = 0 THEN lpad(i::text, 8, '5') END AS phone,
+              CASE WHEN i %% 2 = 1 THEN '+965' || lpad(i::text, 8, '6') END AS mobile,
+              CASE WHEN i %% 2 = 0 THEN lpad(i::text, 8, '5') END AS ordable_phone_key,
+              CASE WHEN i %% 2 = 1 THEN lpad(i::text, 8, '6') END AS ordable_mobile_key
+         FROM generate_series(1, %(partners)s) i""",
+    "ANALYZE pos_order",
+    "ANALYZE ordable_product",
+    "ANALYZE res_partner",
+]
+
+# Same definitions as the init() methods of the module
+INDEXES = [
+    """CREATE UNIQUE INDEX ON pos_order (ordable_tracking_id, ordable_id)
+       WHERE ordable_tracking_id IS NOT NULL""",
+    """CREATE INDEX ON pos_order (concept_id, write_date, id)
+       WHERE state = 'paid' AND ordable_tracking_id IS NULL""",
+    "CREATE UNIQUE INDEX ON ordable_product (concept, ordable_id)",
+    "CREATE INDEX ON ordable_product (concept, name)",
+    "CREATE INDEX ON ordable_product (concept, product_id) WHERE product_id IS NOT NULL",
+    "CREATE INDEX ON res_partner (ordable_phone_key) WHERE ordable_phone_key IS NOT NULL",
+    "CREATE INDEX ON res_partner (ordable_mobile_key) WHERE ordable_mobile_key IS NOT NULL",
+    "ANALYZE pos_order",
+    "ANALYZE ordable_product",
+    "ANALYZE res_partner",
+]
+
+QUERIES = {
+    "webhook duplicate check": """
+        SELECT id FROM pos_order
+         WHERE ordable_id = 4000 AND ordable_tracking_id = 'TRK4000' LIMIT 1""",
+    "bulk sync batch": """
+        SELECT id FROM pos_order
+         WHERE concept_id = 5 AND state = 'paid' AND ordable_tracking_id IS NULL
+           AND write_date > now() - interval '1 hour'
+         ORDER BY write_date, id""",
+    "catalogue upsert page": """
+        SELECT id, ordable_id, name FROM ordable_product
+         WHERE concept = 5 AND ordable_id = ANY(ARRAY(SELECT generate_series(1, 500) * 20 + 4))""",
+    "product by name": """
+        SELECT id FROM ordable_product WHERE concept = 5 AND name = 'Product 1004' LIMIT 1""",
+    "customer by phone": """
+        SELECT id FROM res_partner
+         WHERE ordable_phone_key = '66661001' OR ordable_mobile_key = '66661001' LIMIT 1""",
+}
+
+
+def explain(cr, label):
+    print(f"\n===== {label} =====")
+    for name, query in QUERIES.items():
+        cr.execute("EXPLAIN (ANALYZE, BUFFERS) " + query)
+        print(f"\n--- {name}")
+        for (line,) in cr.fetchall():
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dsn", help="libpq connection string of a scratch database")
+    parser.add_argument("--orders", type=int, default=2000000)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--partners", type=int, default=500000)
+    args = parser.parse_args()
+
+    with psycopg2.connect(args.dsn) as conn, conn.cursor() as cr:
+        start = time.monotonic()
+        for statement in SETUP:
+            cr.execute(statement, vars(args))
+        print(f"Synthetic tables filled in {time.monotonic() - start:.1f}s "
+              f"({args.orders} orders, {args.products} products, {args.partners} partners)")
+
+        explain(cr, "without indexes")
+        start = time.monotonic()
+        for statement in INDEXES:
+            cr.execute(statement)
+        print(f"\nIndexes built in {time.monotonic() - start:.1f}s")
+        explain(cr, "with indexes")
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    main()